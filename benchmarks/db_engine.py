@@ -0,0 +1,98 @@
+"""Concurrent register/submit throughput with default vs tuned engine settings.
+
+Usage: python benchmarks/db_engine.py [--threads 16] [--ops 4000]
+
+Each run uses a fresh SQLite file. Half of the workers insert participants the
+way register_participant does; the other half update results the way a submit
+flush does, one commit per operation.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert, update
+from datetime import datetime
+import concurrent.futures
+import argparse
+import tempfile
+import json
+import time
+
+from src.config import engine_options, apply_sqlite_pragmas
+from src.models.user import db
+from src.models.quiz import Quiz, QuizSession
+from src.models.participant import Participant
+
+SEED_ROWS = 1000
+SESSION_ID = 1
+
+
+def make_engine(uri, tuned):
+    if not tuned:
+        return create_engine(uri)
+    engine = create_engine(uri, **engine_options(uri))
+    event.listen(engine, 'connect', apply_sqlite_pragmas)
+    return engine
+
+
+def register(engine, n):
+    with engine.begin() as conn:
+        conn.execute(insert(Participant.__table__).values(
+            session_id=SESSION_ID, name=f'bench {n}', department='d', post='p', email=f'bench{n}@example.com',
+            mobile='9999999999', created_at=datetime.utcnow()
+        ))
+
+
+def submit(engine, n):
+    with engine.begin() as conn:
+        conn.execute(update(Participant.__table__).where(
+            Participant.__table__.c.id == n % SEED_ROWS + 1
+        ).values(score=n % 75, correct_answers=n % 25, time_taken=n % 175,
+                 answers='[]', completed_at=datetime.utcnow()))
+
+
+def run(tuned, threads, ops):
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = make_engine(uri, tuned)
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Quiz.__table__).values(id=1, title='bench'))
+            conn.execute(insert(QuizSession.__table__).values(id=SESSION_ID, quiz_id=1, name='bench'))
+            conn.execute(insert(Participant.__table__), [
+                {'session_id': SESSION_ID, 'name': 'seed', 'department': 'd', 'post': 'p', 'email': f'seed{i}@example.com',
+                 'mobile': '9999999999', 'created_at': datetime.utcnow()}
+                for i in range(SEED_ROWS)
+            ])
+
+        errors = 0
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+            futures = [pool.submit(register if n % 2 else submit, engine, n) for n in range(ops)]
+            for future in concurrent.futures.as_completed(futures):
+                if future.exception() is not None:
+                    errors += 1
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+
+    return {
+        'engine': 'tuned' if tuned else 'default',
+        'threads': threads,
+        'operations': ops,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'ops_per_second': round((ops - errors) / elapsed, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=4000)
+    args = parser.parse_args()
+    results = [run(False, args.threads, args.ops), run(True, args.threads, args.ops)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""Load test of the quiz lifecycle against the real app, reporting latency per route.
+
+Usage: python benchmarks/lifecycle.py [--rows 10000] [--users 2000] [--concurrency 32]
+                                      [--pollers 2] [--mode client|server] [--output FILE]
+
+Runs fully offline against a throwaway SQLite database seeded with --rows
+completed participants. Each of --users virtual participants registers,
+submits answers, reads the leaderboard and their rank, then reads stats, with
+--concurrency of them in flight at once. Meanwhile --pollers admin clients
+poll stats, the participant list and the leaderboard the way the dashboard
+does. --mode client drives the app through Flask's test client; --mode server
+starts a local threaded HTTP server and goes through real sockets.
+
+Prints JSON with p50/p95/p99 latency (ms), error count and throughput per route.
+"""
+import os
+import sys
+import tempfile
+
+# The app reads its database and log locations at import time
+WORKDIR = tempfile.mkdtemp(prefix='quiz-bench-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+os.environ['SUBMISSION_LOG_DIR'] = WORKDIR
+# Every virtual user shares one IP, which the per-IP limits would throttle
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server
+from collections import defaultdict
+from datetime import datetime, timedelta
+import concurrent.futures
+import http.client
+import logging
+import threading
+import argparse
+import random
+import shutil
+import json
+import time
+
+import numpy as np
+
+from src.main import create_app, init_db, start_services
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.scoring import get_question_bank
+from src.services.submissions import submission_queue
+from src.services.sessions import sessions
+
+SEED_BATCH_SIZE = 5000
+POLL_INTERVAL = 0.5  # seconds between one admin client's polling rounds
+
+
+def seed(app, rows):
+    """Insert completed participants of the active session with random selections, in batches"""
+    bank = get_question_bank()
+    rng = random.Random(0)
+    start = datetime.utcnow() - timedelta(days=1)
+    with app.app_context():
+        session_id = sessions.active_session_id()
+        for offset in range(0, rows, SEED_BATCH_SIZE):
+            batch = []
+            for i in range(offset, min(offset + SEED_BATCH_SIZE, rows)):
+                answers = random_answers(bank, rng)
+                score, correct, selections = bank.grade(answers)
+                batch.append({
+                    'session_id': session_id, 'name': f'seed {i}', 'department': 'विभाग', 'post': 'पद',
+                    'email': f'seed{i}@example.com', 'mobile': '9999999999',
+                    'score': score, 'correct_answers': correct, 'total_questions': len(bank),
+                    'time_taken': rng.randint(60, 600),
+                    'answers': json.dumps(bank.stored_answers(selections), separators=(',', ':')),
+                    'selections': bank.pack(selections),
+                    'created_at': start + timedelta(seconds=i), 'completed_at': start + timedelta(seconds=i, minutes=5)
+                })
+            db.session.execute(db.insert(Participant.__table__), batch)
+            db.session.commit()
+
+
+def random_answers(bank, rng):
+    return [
+        {'questionId': q['id'], 'selectedAnswer': rng.choice([None] + list(range(len(q['options']))))}
+        for q in bank.questions
+    ]
+
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+    def close(self):
+        pass
+
+
+class ServerTransport:
+    """Real HTTP over a local threaded server, one keep-alive connection per thread"""
+
+    def __init__(self, app):
+        # Per-request access logging would dominate the measurement
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.port = self.server.server_port
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            self._local.connection = None
+            raise
+
+    def close(self):
+        self.server.shutdown()
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, transport, route, method, path, body=None, expect=200):
+        start = time.perf_counter()
+        try:
+            status, data = transport.request(method, path, body)
+        except Exception:
+            status, data = None, b''
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            if status != expect:
+                self.errors[route] += 1
+        return json.loads(data) if status == expect else None
+
+    def report(self, wall_time):
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+            routes[route] = {
+                'requests': len(samples),
+                'errors': self.errors[route],
+                'p50_ms': round(float(p50), 2),
+                'p95_ms': round(float(p95), 2),
+                'p99_ms': round(float(p99), 2),
+                'max_ms': round(max(samples) * 1000, 2),
+                'requests_per_second': round(len(samples) / wall_time, 1)
+            }
+        return routes
+
+
+def participant_lifecycle(transport, recorder, bank, n, rng):
+    registered = recorder.call(transport, 'POST /api/quiz/participants', 'POST', '/api/quiz/participants', {
+        'name': f'bench {n}', 'department': 'विभाग', 'post': 'पद',
+        'email': f'bench{n}@example.com', 'mobile': '9999999999'
+    })
+    if registered is None:
+        return
+    participant_id = registered['participant']['id']
+    recorder.call(
+        transport, 'POST /api/quiz/participants/<id>/submit', 'POST',
+        f'/api/quiz/participants/{participant_id}/submit',
+        {'answers': random_answers(bank, rng), 'time_taken': rng.randint(60, 600)}
+    )
+    recorder.call(transport, 'GET /api/quiz/leaderboard', 'GET', '/api/quiz/leaderboard?limit=10')
+    recorder.call(transport, 'GET /api/quiz/leaderboard/rank/<id>', 'GET',
+                  f'/api/quiz/leaderboard/rank/{participant_id}')
+    recorder.call(transport, 'GET /api/quiz/participants/stats', 'GET', '/api/quiz/participants/stats')
+
+
+def admin_poller(transport, recorder, stop):
+    fields = 'id,name,email,score,correct_answers,total_questions,created_at,completed_at'
+    while not stop.is_set():
+        recorder.call(transport, 'GET /api/quiz/participants/stats (admin)', 'GET', '/api/quiz/participants/stats')
+        recorder.call(transport, 'GET /api/quiz/participants (admin)', 'GET',
+                      f'/api/quiz/participants?limit=100&fields={fields}')
+        recorder.call(transport, 'GET /api/quiz/leaderboard (admin)', 'GET', '/api/quiz/leaderboard?limit=10')
+        stop.wait(POLL_INTERVAL)
+
+
+def run(args):
+    app = create_app()
+    init_db(app)
+    seed_start = time.perf_counter()
+    seed(app, args.rows)
+    seed_seconds = time.perf_counter() - seed_start
+    start_services(app)
+
+    transport = ServerTransport(app) if args.mode == 'server' else TestClientTransport(app)
+    recorder = Recorder()
+    bank = get_question_bank()
+    stop = threading.Event()
+    pollers = [
+        threading.Thread(target=admin_poller, args=(transport, recorder, stop), daemon=True)
+        for _ in range(args.pollers)
+    ]
+
+    start = time.perf_counter()
+    for poller in pollers:
+        poller.start()
+    with concurrent.futures.ThreadPoolExecutor(args.concurrency) as pool:
+        futures = [
+            pool.submit(participant_lifecycle, transport, recorder, bank, n, random.Random(n))
+            for n in range(args.users)
+        ]
+        for future in futures:
+            future.result()
+    stop.set()
+    for poller in pollers:
+        poller.join()
+    wall_time = time.perf_counter() - start
+
+    drain_start = time.perf_counter()
+    submission_queue.wait_idle()
+    drain_seconds = time.perf_counter() - drain_start
+    transport.close()
+
+    return {
+        'mode': args.mode,
+        'seed_rows': args.rows,
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'admin_pollers': args.pollers,
+        'seed_seconds': round(seed_seconds, 2),
+        'wall_seconds': round(wall_time, 2),
+        'submission_drain_seconds': round(drain_seconds, 3),
+        'lifecycles_per_second': round(args.users / wall_time, 1),
+        'routes': recorder.report(wall_time)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='participants seeded before the run')
+    parser.add_argument('--users', type=int, default=2000, help='participant lifecycles to run')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--pollers', type=int, default=2, help='concurrent admin dashboard clients')
+    parser.add_argument('--mode', choices=('client', 'server'), default='client')
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    args = parser.parse_args()
+
+    try:
+        result = run(args)
+    finally:
+        submission_queue.shutdown()
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    report = json.dumps(result, indent=2, ensure_ascii=False)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""List-endpoint serialization cost: ORM to_dict + stdlib JSON vs raw rows + orjson.
+
+Usage: python benchmarks/serialization.py [--rows 10000 100000] [--repeat 3]
+
+Each size is seeded into an in-memory SQLite database with completed
+participants carrying a full answers blob. Every strategy loads all rows,
+turns them into dicts and encodes one response body the way jsonify would;
+the best of --repeat runs is reported, split into load, dict and encode time.
+"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from datetime import datetime
+import argparse
+import json
+import time
+
+from src.models.user import db
+from src.models.quiz import Quiz, QuizSession
+from src.models.participant import Participant
+from src.serialization import OrjsonProvider, StandardProvider
+
+QUESTIONS = 25
+SESSION_ID = 1
+
+
+def seed(rows):
+    answers = json.dumps([
+        {'questionId': q + 1, 'selectedAnswer': q % 4} for q in range(QUESTIONS)
+    ], separators=(',', ':'))
+    now = datetime.utcnow()
+    db.session.add(Quiz(id=1, title='bench'))
+    db.session.add(QuizSession(id=SESSION_ID, quiz_id=1, name='bench'))
+    db.session.flush()
+    db.session.execute(db.insert(Participant.__table__), [
+        {'session_id': SESSION_ID, 'name': f'प्रतिभागी {i}', 'department': 'विभाग', 'post': 'पद', 'email': f'bench{i}@example.com',
+         'mobile': '9999999999', 'score': i % 75, 'correct_answers': i % 25, 'time_taken': i % 175,
+         'answers': answers, 'created_at': now, 'completed_at': now}
+        for i in range(rows)
+    ])
+    db.session.commit()
+
+
+def orm_to_dict():
+    participants = Participant.query.all()
+    loaded = time.perf_counter()
+    return loaded, [p.to_dict() for p in participants]
+
+
+def rows_row_to_dict():
+    rows = db.session.query(*[getattr(Participant, f) for f in Participant.FIELDS]).all()
+    loaded = time.perf_counter()
+    return loaded, [Participant.row_to_dict(row, Participant.FIELDS) for row in rows]
+
+
+def rows_serializer():
+    rows = db.session.execute(db.select(*[getattr(Participant, f) for f in Participant.FIELDS])).all()
+    loaded = time.perf_counter()
+    serialize = Participant.serializer(Participant.FIELDS)
+    return loaded, [serialize(row) for row in rows]
+
+
+STRATEGIES = [
+    ('orm to_dict + stdlib json', orm_to_dict, StandardProvider),
+    ('row_to_dict + orjson', rows_row_to_dict, OrjsonProvider),
+    ('serializer + orjson', rows_serializer, OrjsonProvider),
+]
+
+
+def measure(app, load, provider_class):
+    app.json = provider_class(app)
+    db.session.expunge_all()
+    start = time.perf_counter()
+    loaded, participants = load()
+    built = time.perf_counter()
+    body = app.json.response({'success': True, 'participants': participants}).get_data()
+    done = time.perf_counter()
+    db.session.expunge_all()
+    return {
+        'load': loaded - start,
+        'dicts': built - loaded,
+        'encode': done - built,
+        'total': done - start,
+        'bytes': len(body),
+    }
+
+
+def run(rows, repeat):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    results = []
+    with app.app_context():
+        db.create_all()
+        seed(rows)
+        for name, load, provider_class in STRATEGIES:
+            best = min((measure(app, load, provider_class) for _ in range(repeat)), key=lambda r: r['total'])
+            results.append({
+                'strategy': name,
+                'rows': rows,
+                **{k: round(v, 4) if isinstance(v, float) else v for k, v in best.items()},
+                'rows_per_second': round(rows / best['total'])
+            })
+        db.session.remove()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    results = []
+    for rows in args.rows:
+        results.extend(run(rows, args.repeat))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# Gunicorn settings for production: gunicorn src.wsgi:app
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+# Workers sized to the cores available; each runs a small thread pool so
+# requests waiting on the database do not block the whole process
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+
+# Apps are built per worker so background threads start after the fork
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Create the schema once in the master before any worker boots"""
+    from src.startup import STARTUP_MODE
+    if STARTUP_MODE == 'lazy':
+        # Workers check the schema in the background once they are listening
+        return
+    from src.main import create_app, init_db
+    from src.models.user import db
+
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        db.engine.dispose()
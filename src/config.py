@@ -0,0 +1,65 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from src.models.user import db
+import os
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds
+
+# Applied to every new SQLite connection
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+    ('mmap_size', os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+)
+
+
+def database_uri():
+    """Resolve the database URI from DATABASE_URL, falling back to the bundled SQLite file"""
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        return f"sqlite:///{DEFAULT_SQLITE_PATH}"
+    # Render hands out postgres:// URLs, which SQLAlchemy no longer accepts
+    if database_url.startswith('postgres://'):
+        database_url = 'postgresql://' + database_url[len('postgres://'):]
+    return database_url
+
+
+def engine_options(uri):
+    url = make_url(uri)
+    options = {'pool_pre_ping': True}
+    if url.get_backend_name() == 'sqlite':
+        # In-memory databases use a single shared connection and take no pool sizing
+        if url.database and url.database != ':memory:':
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    else:
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS:
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+
+def configure_database(app):
+    """Configure SQLAlchemy for the app and tune connections for the chosen backend"""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or database_uri()
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(uri))
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            event.listen(db.engine, 'connect', apply_sqlite_pragmas)
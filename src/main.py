@@ -3,56 +3,125 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from src.models.user import db
+from src.config import configure_database
+from src.serialization import configure_json
+from src import migrations
 from src.models.participant import Participant
+from src.models.submission_receipt import SubmissionReceipt
+from src.models.progress import AnswerProgress
+from src.models.email_job import EmailJobState
+from src.models.quiz import Quiz, QuizSession, AnswerKey
 from src.routes.user import user_bp
 from src.routes.quiz import quiz_bp
 from src.routes.admin import admin_bp
 from src.routes.health import health_bp
+from src.services.leaderboard import leaderboards
+from src.services.sessions import sessions
+from src.services.submissions import submission_queue
+from src.services.progress import progress_buffer
+from src.services.static_assets import static_assets, compress_static
+from src.services.delivery import question_delivery
+from src.services.metrics import request_metrics
+from src.services.http_cache import response_cache
+from src.services.stats import stats_caches
+from src.services.templates import template_cache
+from src.startup import startup_timer
+
+
+def create_app():
+    """Build the Flask app; does not touch the schema or start background services"""
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+
+    # Number of reverse proxies in front of the app (1 on Render), so
+    # request.remote_addr is the real client for per-IP rate limits
+    proxy_hops = int(os.environ.get('PROXY_FIX_X_FOR', '0'))
+    if proxy_hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops)
+
+    # Fast JSON encoder for API responses (JSON_PROVIDER=default to opt out)
+    configure_json(app)
+    # Per-route timing, SQL and response-size metrics served at /metrics
+    request_metrics.init_app(app)
+    # Conditional GET for the polled endpoints and gzip for large JSON bodies
+    response_cache.init_app(app)
+
+    # Enable CORS for all routes
+    CORS(app)
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(quiz_bp, url_prefix='/api/quiz')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(health_bp)
+
+    # Database configuration: DATABASE_URL in production, bundled SQLite in development
+    configure_database(app)
+
+    static_assets.init_app(app)
+    app.add_url_rule('/', 'serve', serve, defaults={'path': ''})
+    app.add_url_rule('/<path:path>', 'serve', serve)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables and apply pending migrations."""
+        init_db(app)
+
+    @app.cli.command('compress-static')
+    def compress_static_command():
+        """Write gzip and brotli variants of the static files."""
+        for path in compress_static(app.static_folder):
+            print(path)
+
+    return app
+
+
+def init_db(app):
+    """Create missing tables and apply pending migrations; run once per deployment"""
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade(db.engine)
+
+
+def start_services(app, init_schema=False):
+    """Warm in-memory state and start background workers for this process"""
+    if init_schema:
+        # Lazy start: no master ran init_db; workers take turns (see src/startup.py)
+        with startup_timer.phase('schema'):
+            init_db(app)
+    with app.app_context():
+        with startup_timer.phase('db_connect'):
+            db.session.execute(db.text('SELECT 1'))
+        with startup_timer.phase('caches'):
+            active_session_id = sessions.active_session_id()
+            if active_session_id is not None:
+                leaderboards.get(active_session_id).rebuild()
+                stats_caches.get(active_session_id).get()
+            question_delivery.warm()
+            template_cache.page('admin/dashboard.html')
+    with startup_timer.phase('submission_queue'):
+        submission_queue.init_app(app)
+    progress_buffer.init_app(app)
+
 
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Enable CORS for all routes
-CORS(app)
-
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(quiz_bp, url_prefix='/api/quiz')
-app.register_blueprint(admin_bp, url_prefix='/admin')
-app.register_blueprint(health_bp)
-
-# Database configuration for production and development
-database_url = os.environ.get('DATABASE_URL')
-if database_url:
-    # Production: Use PostgreSQL from Render
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///quiz.db'
-else:
-    # Development: Use SQLite
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
+    """Serve the built frontend from the in-memory manifest, falling back to index.html"""
+    asset = static_assets.get(path) if path else None
+    if asset is None:
+        asset = static_assets.index
+        if asset is None:
             return "index.html not found", 404
+    return static_assets.respond(asset)
 
 
 if __name__ == '__main__':
+    # Development server only; production runs gunicorn with src/wsgi.py
+    app = create_app()
+    init_db(app)
+    start_services(app)
+    startup_timer.finish()
     debug = os.environ.get('FLASK_ENV') != 'production'
-    app.run(host='0.0.0.0', port=8080, debug=debug)
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)), debug=debug)
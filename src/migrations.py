@@ -0,0 +1,143 @@
+"""Versioned schema migrations.
+
+db.create_all() only creates missing tables; it never alters existing ones.
+Each migration here runs once per database, in order, and is recorded in the
+schema_migrations table. Add new steps to the end of MIGRATIONS.
+"""
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.scoring import get_question_bank
+from src.services.sessions import ensure_default_session
+from sqlalchemy.schema import CreateIndex
+from datetime import datetime
+import json
+
+BACKFILL_BATCH_SIZE = 2000
+
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(200), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False),
+)
+
+
+def _create_indexes(connection, table, names):
+    for index in table.indexes:
+        if index.name in names:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _check_duplicate_emails(connection):
+    """Fail with the offending emails if the per-session unique email index cannot be built"""
+    table = Participant.__table__
+    email = db.func.lower(table.c.email)
+    duplicates = connection.execute(
+        db.select(table.c.session_id, email, db.func.count())
+        .group_by(table.c.session_id, email)
+        .having(db.func.count() > 1)
+    ).all()
+    if duplicates:
+        emails = ', '.join(f'{address} (session {session_id})' for session_id, address, _ in duplicates)
+        raise RuntimeError(
+            f'Cannot add unique email index; resolve duplicate registrations first: {emails}'
+        )
+
+
+def participant_lookup_indexes(connection):
+    """Index created_at, leaderboard order and case-insensitive email"""
+    # On databases created after migration 3 these names no longer exist and this is a no-op;
+    # emails are checked for duplicates per session when migration 3 builds its index
+    _create_indexes(connection, Participant.__table__, {
+        'ix_participant_created_at_id',
+        'ix_participant_completed_rank',
+        'ux_participant_email_lower',
+    })
+
+
+def _add_column(connection, table, column):
+    if column.name in {c['name'] for c in db.inspect(connection).get_columns(table.name)}:
+        return
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
+def participant_packed_selections(connection):
+    """Add the one-byte-per-question selections column and backfill it from answers"""
+    table = Participant.__table__
+    _add_column(connection, table, table.c.selections)
+
+    bank = get_question_bank()
+    update = db.update(table).where(table.c.id == db.bindparam('participant_id')).values(
+        selections=db.bindparam('packed')
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            db.select(table.c.id, table.c.answers)
+            .where(table.c.answers.isnot(None), table.c.selections.is_(None), table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(update, [
+            {'participant_id': row.id, 'packed': bank.pack(bank.selections(_decode_answers(row.answers)))}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+
+def _decode_answers(answers):
+    try:
+        decoded = json.loads(answers)
+    except ValueError:
+        return []
+    return decoded if isinstance(decoded, list) else []
+
+
+def participant_sessions(connection):
+    """Scope participants to quiz sessions and re-key the hot indexes by session"""
+    table = Participant.__table__
+    _add_column(connection, table, table.c.session_id)
+    session_id = ensure_default_session(connection)
+    connection.execute(db.update(table).where(table.c.session_id.is_(None)).values(session_id=session_id))
+    # Replaced by the session-leading indexes below
+    for name in ('ix_participant_created_at_id', 'ux_participant_email_lower', 'ix_participant_completed_rank'):
+        connection.execute(db.text(f'DROP INDEX IF EXISTS {name}'))
+    _check_duplicate_emails(connection)
+    _create_indexes(connection, table, {
+        'ix_participant_session_created',
+        'ux_participant_session_email',
+        'ix_participant_session_rank',
+    })
+
+
+def participant_answer_key_version(connection):
+    """Record which answer key each score was graded with; existing rows are left unknown"""
+    _add_column(connection, Participant.__table__, Participant.__table__.c.answer_key_version)
+
+
+MIGRATIONS = [
+    (1, 'participant lookup indexes', participant_lookup_indexes),
+    (2, 'participant packed selections', participant_packed_selections),
+    (3, 'participant sessions', participant_sessions),
+    (4, 'participant answer key version', participant_answer_key_version),
+]
+
+
+def upgrade(engine):
+    """Apply every migration newer than the database's recorded version"""
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied = set(connection.execute(db.select(schema_migrations.c.version)).scalars())
+
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        with engine.begin() as connection:
+            migrate(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+    return [version for version, _, _ in MIGRATIONS if version not in applied]
@@ -0,0 +1,49 @@
+from src.models.user import db
+from datetime import datetime
+import json
+
+class EmailJobState(db.Model):
+    """Last reported progress of a bulk email job, readable from every worker"""
+    __tablename__ = 'email_job'
+
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), nullable=False)  # queued, running or completed
+    total = db.Column(db.Integer, nullable=False)
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_count = db.Column(db.Integer, nullable=False, default=0)
+    failed_emails = db.Column(db.Text)  # JSON list of {"email", "error"}
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<EmailJobState {self.id}>'
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'sent_count': self.sent_count,
+            'failed_count': self.failed_count,
+            'pending_count': self.total - self.sent_count - self.failed_count,
+            'failed_emails': json.loads(self.failed_emails) if self.failed_emails else []
+        }
+
+    @classmethod
+    def save(cls, state):
+        """Store a job's progress as produced by EmailJob.to_dict(), creating the row on first report"""
+        table = cls.__table__
+        values = {
+            'status': state['status'],
+            'total': state['total'],
+            'sent_count': state['sent_count'],
+            'failed_count': state['failed_count'],
+            'failed_emails': json.dumps(state['failed_emails'], ensure_ascii=False),
+            'updated_at': datetime.utcnow()
+        }
+        updated = db.session.execute(
+            db.update(table).where(table.c.id == state['job_id']).values(**values)
+        ).rowcount
+        if not updated:
+            db.session.execute(db.insert(table).values(id=state['job_id'], created_at=values['updated_at'], **values))
+        db.session.commit()
@@ -1,4 +1,6 @@
 from src.models.user import db
+from src.serialization import RawJSON
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import json
 
@@ -9,13 +11,36 @@ class Participant(db.Model):
     post = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), nullable=False)
     mobile = db.Column(db.String(15), nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey('quiz_session.id'))
     score = db.Column(db.Integer, default=0)
     total_questions = db.Column(db.Integer, default=25)
     correct_answers = db.Column(db.Integer, default=0)
     time_taken = db.Column(db.Integer, default=0)  # in seconds
     answers = db.Column(db.Text)  # JSON string of answers
+    selections = db.Column(db.LargeBinary)  # one byte per question, 0xFF = unanswered
+    answer_key_version = db.Column(db.Integer)  # answer_key version the score was graded with
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime)
+
+    # Every hot query is scoped to one session, so each index leads with session_id
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) in descending order
+        db.Index('ix_participant_session_created', 'session_id', 'created_at', 'id'),
+        # One registration per email and session regardless of case
+        db.Index('ux_participant_session_email', 'session_id', db.func.lower(email), unique=True),
+        # Leaderboard order over completed rows only
+        db.Index(
+            'ix_participant_session_rank',
+            'session_id', score.desc(), time_taken, id,
+            sqlite_where=completed_at.isnot(None),
+            postgresql_where=completed_at.isnot(None)
+        ),
+    )
+
+    # Columns exposed through the API, in response order
+    FIELDS = ('id', 'session_id', 'name', 'department', 'post', 'email', 'mobile', 'score',
+              'total_questions', 'correct_answers', 'time_taken', 'answers',
+              'created_at', 'completed_at')
     
     def __repr__(self):
         return f'<Participant {self.name}>'
@@ -23,6 +48,7 @@ class Participant(db.Model):
     def to_dict(self):
         return {
             'id': self.id,
+            'session_id': self.session_id,
             'name': self.name,
             'department': self.department,
             'post': self.post,
@@ -37,9 +63,128 @@ class Participant(db.Model):
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
     
+    @classmethod
+    def insert_if_new(cls, **values):
+        """Insert a participant unless the email is taken, in one round-trip.
+
+        Returns the inserted row with columns in FIELDS order, or None when the
+        unique email index rejected it.
+        """
+        table = cls.__table__
+        columns = [table.c[field] for field in cls.FIELDS]
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            insert = None
+
+        if insert is not None:
+            stmt = insert(table).values(**values).on_conflict_do_nothing().returning(*columns)
+            row = db.session.execute(stmt).first()
+            db.session.commit()
+            return row
+
+        try:
+            row = db.session.execute(db.insert(table).values(**values).returning(*columns)).first()
+            db.session.commit()
+            return row
+        except IntegrityError:
+            db.session.rollback()
+            return None
+
+    @classmethod
+    def insert_many(cls, rows):
+        """Insert a batch of participants in one transaction, skipping emails already taken.
+
+        Returns the set of emails that were inserted; rows are sent as
+        multi-row INSERTs rather than one statement per participant.
+        """
+        table = cls.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            insert = None
+
+        if insert is not None:
+            stmt = insert(table).on_conflict_do_nothing().returning(table.c.email)
+            inserted = set(db.session.execute(stmt, rows).scalars())
+            db.session.commit()
+            return inserted
+
+        try:
+            db.session.execute(db.insert(table), rows)
+            db.session.commit()
+            return {row['email'] for row in rows}
+        except IntegrityError:
+            # Someone registered concurrently; fall back to one row at a time
+            db.session.rollback()
+            return {row['email'] for row in rows if cls.insert_if_new(**row) is not None}
+
+    @staticmethod
+    def row_to_dict(row, fields):
+        """Serialize a column-projected query row holding the given fields"""
+        data = {}
+        for field, value in zip(fields, row):
+            if field == 'answers':
+                value = json.loads(value) if value else []
+            elif field in ('created_at', 'completed_at'):
+                value = value.isoformat() if value else None
+            data[field] = value
+        return data
+    
+    @staticmethod
+    def serializer(fields):
+        """Build a fast serializer for rows holding the given fields.
+
+        Unlike row_to_dict, the stored answers JSON is passed through as
+        RawJSON instead of being decoded, so only the response encoder touches it.
+        """
+        convert = {
+            'answers': lambda value: RawJSON(value or '[]'),
+            'created_at': lambda value: value.isoformat() if value else None,
+            'completed_at': lambda value: value.isoformat() if value else None,
+        }
+        special = tuple((i, field, convert[field]) for i, field in enumerate(fields) if field in convert)
+        
+        def serialize(row):
+            # Overwriting keys keeps their position, so output follows fields order
+            data = dict(zip(fields, row))
+            for i, field, fn in special:
+                data[field] = fn(row[i])
+            return data
+        return serialize
+    
     def set_answers(self, answers_list):
-        self.answers = json.dumps(answers_list)
+        # Compact separators: the stored text is sent to clients verbatim
+        self.answers = json.dumps(answers_list, separators=(',', ':'))
     
     def get_answers(self):
         return json.loads(self.answers) if self.answers else []
 
+
+
+# Cold storage for participants of archived sessions: same columns, no hot indexes
+participant_archive = db.Table(
+    'participant_archive',
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('session_id', db.Integer, index=True),
+    db.Column('name', db.String(100), nullable=False),
+    db.Column('department', db.String(100), nullable=False),
+    db.Column('post', db.String(100), nullable=False),
+    db.Column('email', db.String(120), nullable=False),
+    db.Column('mobile', db.String(15), nullable=False),
+    db.Column('score', db.Integer),
+    db.Column('total_questions', db.Integer),
+    db.Column('correct_answers', db.Integer),
+    db.Column('time_taken', db.Integer),
+    db.Column('answers', db.Text),
+    db.Column('selections', db.LargeBinary),
+    db.Column('created_at', db.DateTime),
+    db.Column('completed_at', db.DateTime),
+    db.Column('archived_at', db.DateTime, nullable=False),
+)
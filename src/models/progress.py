@@ -0,0 +1,60 @@
+from src.models.user import db
+from datetime import datetime
+
+class AnswerProgress(db.Model):
+    """A participant's latest answer to one question, saved before the final submit"""
+    __tablename__ = 'answer_progress'
+
+    participant_id = db.Column(db.Integer, db.ForeignKey('participant.id'), primary_key=True)
+    question_id = db.Column(db.Integer, primary_key=True)
+    selected_answer = db.Column(db.Integer)  # original option index, None = cleared
+    time_taken = db.Column(db.Integer, default=0)  # seconds into the quiz when answered
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AnswerProgress {self.participant_id}:{self.question_id}>'
+
+    @classmethod
+    def save_many(cls, rows):
+        """Insert or overwrite a batch of (participant, question) answers in one statement"""
+        table = cls.__table__
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            insert = None
+
+        if insert is not None:
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.participant_id, table.c.question_id],
+                set_={
+                    'selected_answer': stmt.excluded.selected_answer,
+                    'time_taken': stmt.excluded.time_taken,
+                    'updated_at': stmt.excluded.updated_at
+                }
+            )
+            db.session.execute(stmt, rows)
+            return
+
+        for row in rows:
+            db.session.execute(db.delete(table).where(
+                table.c.participant_id == row['participant_id'],
+                table.c.question_id == row['question_id']
+            ))
+        db.session.execute(db.insert(table), rows)
+
+    @classmethod
+    def discard(cls, participant_ids):
+        """Drop the saved answers of participants who have submitted"""
+        db.session.execute(db.delete(cls.__table__).where(cls.participant_id.in_(participant_ids)))
+
+    @classmethod
+    def for_participant(cls, participant_id):
+        """{question_id: (selected_answer, time_taken)} as stored"""
+        rows = db.session.query(cls.question_id, cls.selected_answer, cls.time_taken).filter(
+            cls.participant_id == participant_id
+        ).all()
+        return {row.question_id: (row.selected_answer, row.time_taken or 0) for row in rows}
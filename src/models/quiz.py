@@ -0,0 +1,66 @@
+from src.models.user import db
+from datetime import datetime
+
+class Quiz(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Quiz {self.title}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class QuizSession(db.Model):
+    """One sitting of a quiz, e.g. a department's slot; participants belong to one session"""
+    __tablename__ = 'quiz_session'
+
+    # open: accepts registrations and submits; closed: read-only;
+    # archived: participants moved to participant_archive
+    STATUSES = ('open', 'closed', 'archived')
+
+    id = db.Column(db.Integer, primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='open')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    closed_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_quiz_session_status', 'status', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<QuizSession {self.name}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'quiz_id': self.quiz_id,
+            'name': self.name,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
+
+
+class AnswerKey(db.Model):
+    """A published question bank; the highest version is the one every worker grades with"""
+    __tablename__ = 'answer_key'
+
+    version = db.Column(db.Integer, primary_key=True)
+    questions = db.Column(db.Text, nullable=False)  # questions.json as it was reloaded
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<AnswerKey {self.version}>'
@@ -0,0 +1,45 @@
+from src.models.user import db
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+
+class SubmissionReceipt(db.Model):
+    """The accepted submit for a participant and the response it produced"""
+    __tablename__ = 'submission_receipt'
+
+    participant_id = db.Column(db.Integer, db.ForeignKey('participant.id'), primary_key=True)
+    key = db.Column(db.String(64), nullable=False)  # sha256 of the Idempotency-Key or payload
+    response = db.Column(db.Text, nullable=False)  # JSON body returned to the first submit
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SubmissionReceipt {self.participant_id}>'
+
+    @classmethod
+    def record(cls, receipts):
+        """Insert receipts in the caller's transaction, keeping any already stored.
+
+        receipts is a list of dicts with participant_id, key and response.
+        """
+        if not receipts:
+            return
+        table = cls.__table__
+        now = datetime.utcnow()
+        rows = [dict(receipt, created_at=now) for receipt in receipts]
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            insert = None
+
+        if insert is not None:
+            db.session.execute(insert(table).on_conflict_do_nothing(), rows)
+            return
+
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(table).values(**row))
+            except IntegrityError:
+                pass
@@ -1,252 +1,277 @@
-from flask import Blueprint, request, jsonify, render_template_string
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from src.models.participant import db, Participant
+from src.services.stats import stats_caches, session_activity
+from src.services.leaderboard import leaderboards
+from src.services.sessions import sessions, SessionError, create_session, close_session, archive_session
+from src.services.idempotency import submission_receipts
+from src.services.submissions import submission_queue
+from src.services.progress import progress_buffer
+from src.models.quiz import Quiz, QuizSession
+from src.services.scoring import reload_question_bank, rescore_all
+from src.services.export import iter_export_rows, iter_csv, iter_xlsx
+from src.services.item_analysis import item_analysis
+from src.services.roster_import import import_roster, iter_csv_records, iter_json_records
+from src.services.events import (
+    event_broker, format_event, SSE_KEEPALIVE, SSE_RESYNC_INTERVAL, LEADERBOARD_EVENT_SIZE
+)
+from src.services.templates import template_cache
+from src.services.static_assets import static_assets
+from src.services.http_cache import data_version
 from datetime import datetime
 import json
+import time
 
 admin_bp = Blueprint('admin', __name__)
 
 @admin_bp.route('/dashboard')
 def admin_dashboard():
     """Admin dashboard for managing participants and sending emails"""
-    dashboard_html = """
-    <!DOCTYPE html>
-    <html lang="hi">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>हिंदी राजभाषा प्रश्नोत्तरी - प्रशासन पैनल</title>
-        <script src="https://cdn.tailwindcss.com"></script>
-        <style>
-            @import url('https://fonts.googleapis.com/css2?family=Noto+Sans+Devanagari:wght@400;500;600;700&display=swap');
-            body { font-family: 'Noto Sans Devanagari', sans-serif; }
-        </style>
-    </head>
-    <body class="bg-gray-50">
-        <div class="min-h-screen">
-            <!-- Header -->
-            <header class="bg-orange-600 text-white shadow-lg">
-                <div class="max-w-7xl mx-auto px-4 py-6">
-                    <h1 class="text-3xl font-bold">हिंदी राजभाषा प्रश्नोत्तरी - प्रशासन पैनल</h1>
-                    <p class="text-orange-100 mt-2">प्रतिभागी प्रबंधन और ईमेल भेजना</p>
-                </div>
-            </header>
-
-            <div class="max-w-7xl mx-auto px-4 py-8">
-                <!-- Stats Cards -->
-                <div class="grid grid-cols-1 md:grid-cols-4 gap-6 mb-8">
-                    <div class="bg-white rounded-lg shadow p-6">
-                        <div class="flex items-center">
-                            <div class="p-2 bg-blue-100 rounded-lg">
-                                <svg class="w-6 h-6 text-blue-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M17 20h5v-2a3 3 0 00-5.356-1.857M17 20H7m10 0v-2c0-.656-.126-1.283-.356-1.857M7 20H2v-2a3 3 0 015.356-1.857M7 20v-2c0-.656.126-1.283.356-1.857m0 0a5.002 5.002 0 019.288 0M15 7a3 3 0 11-6 0 3 3 0 016 0zm6 3a2 2 0 11-4 0 2 2 0 014 0zM7 10a2 2 0 11-4 0 2 2 0 014 0z"></path>
-                                </svg>
-                            </div>
-                            <div class="ml-4">
-                                <p class="text-sm font-medium text-gray-600">कुल प्रतिभागी</p>
-                                <p class="text-2xl font-semibold text-gray-900" id="total-participants">0</p>
-                            </div>
-                        </div>
-                    </div>
-
-                    <div class="bg-white rounded-lg shadow p-6">
-                        <div class="flex items-center">
-                            <div class="p-2 bg-green-100 rounded-lg">
-                                <svg class="w-6 h-6 text-green-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M9 12l2 2 4-4m6 2a9 9 0 11-18 0 9 9 0 0118 0z"></path>
-                                </svg>
-                            </div>
-                            <div class="ml-4">
-                                <p class="text-sm font-medium text-gray-600">पूर्ण किए गए</p>
-                                <p class="text-2xl font-semibold text-gray-900" id="completed-participants">0</p>
-                            </div>
-                        </div>
-                    </div>
-
-                    <div class="bg-white rounded-lg shadow p-6">
-                        <div class="flex items-center">
-                            <div class="p-2 bg-yellow-100 rounded-lg">
-                                <svg class="w-6 h-6 text-yellow-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 7h8m0 0v8m0-8l-8 8-4-4-6 6"></path>
-                                </svg>
-                            </div>
-                            <div class="ml-4">
-                                <p class="text-sm font-medium text-gray-600">औसत स्कोर</p>
-                                <p class="text-2xl font-semibold text-gray-900" id="average-score">0</p>
-                            </div>
-                        </div>
-                    </div>
-
-                    <div class="bg-white rounded-lg shadow p-6">
-                        <div class="flex items-center">
-                            <div class="p-2 bg-purple-100 rounded-lg">
-                                <svg class="w-6 h-6 text-purple-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M5 3v4M3 5h4M6 17v4m-2-2h4m5-16l2.286 6.857L21 12l-5.714 2.143L13 21l-2.286-6.857L5 12l5.714-2.143L13 3z"></path>
-                                </svg>
-                            </div>
-                            <div class="ml-4">
-                                <p class="text-sm font-medium text-gray-600">सर्वोच्च स्कोर</p>
-                                <p class="text-2xl font-semibold text-gray-900" id="highest-score">0</p>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-
-                <!-- Email Section -->
-                <div class="bg-white rounded-lg shadow mb-8">
-                    <div class="px-6 py-4 border-b border-gray-200">
-                        <h2 class="text-xl font-semibold text-gray-900">ईमेल भेजें</h2>
-                    </div>
-                    <div class="p-6">
-                        <div class="mb-4">
-                            <label class="block text-sm font-medium text-gray-700 mb-2">प्रश्नोत्तरी URL</label>
-                            <input type="url" id="quiz-url" class="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-orange-500" 
-                                   value="http://localhost:3000" placeholder="प्रश्नोत्तरी का URL दर्ज करें">
-                        </div>
-                        <div class="mb-4">
-                            <label class="block text-sm font-medium text-gray-700 mb-2">ईमेल पते (प्रत्येक लाइन में एक)</label>
-                            <textarea id="email-list" rows="6" class="w-full px-3 py-2 border border-gray-300 rounded-md focus:outline-none focus:ring-2 focus:ring-orange-500" 
-                                      placeholder="example1@email.com&#10;example2@email.com&#10;example3@email.com"></textarea>
-                        </div>
-                        <button onclick="sendEmails()" class="bg-orange-600 hover:bg-orange-700 text-white px-6 py-2 rounded-md font-medium">
-                            ईमेल भेजें
-                        </button>
-                        <div id="email-status" class="mt-4"></div>
-                    </div>
-                </div>
-
-                <!-- Participants Table -->
-                <div class="bg-white rounded-lg shadow">
-                    <div class="px-6 py-4 border-b border-gray-200 flex justify-between items-center">
-                        <h2 class="text-xl font-semibold text-gray-900">प्रतिभागी सूची</h2>
-                        <button onclick="refreshData()" class="bg-blue-600 hover:bg-blue-700 text-white px-4 py-2 rounded-md text-sm font-medium">
-                            रीफ्रेश करें
-                        </button>
-                    </div>
-                    <div class="overflow-x-auto">
-                        <table class="min-w-full divide-y divide-gray-200">
-                            <thead class="bg-gray-50">
-                                <tr>
-                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">नाम</th>
-                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">ईमेल</th>
-                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">स्कोर</th>
-                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">सही उत्तर</th>
-                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">स्थिति</th>
-                                    <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">दिनांक</th>
-                                </tr>
-                            </thead>
-                            <tbody id="participants-table" class="bg-white divide-y divide-gray-200">
-                                <!-- Participants will be loaded here -->
-                            </tbody>
-                        </table>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <script>
-            // Load data on page load
-            document.addEventListener('DOMContentLoaded', function() {
-                refreshData();
-            });
-
-            async function refreshData() {
-                try {
-                    // Load stats
-                    const statsResponse = await fetch('/api/quiz/participants/stats');
-                    const statsData = await statsResponse.json();
-                    
-                    if (statsData.success) {
-                        document.getElementById('total-participants').textContent = statsData.stats.total_participants;
-                        document.getElementById('completed-participants').textContent = statsData.stats.completed_participants;
-                        document.getElementById('average-score').textContent = statsData.stats.average_score;
-                        document.getElementById('highest-score').textContent = statsData.stats.highest_score;
-                    }
-
-                    // Load participants
-                    const participantsResponse = await fetch('/api/quiz/participants');
-                    const participantsData = await participantsResponse.json();
-                    
-                    if (participantsData.success) {
-                        const tbody = document.getElementById('participants-table');
-                        tbody.innerHTML = '';
-                        
-                        participantsData.participants.forEach(participant => {
-                            const row = document.createElement('tr');
-                            const status = participant.completed_at ? 'पूर्ण' : 'प्रगति में';
-                            const statusClass = participant.completed_at ? 'text-green-600 bg-green-100' : 'text-yellow-600 bg-yellow-100';
-                            
-                            row.innerHTML = `
-                                <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">${participant.name}</td>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">${participant.email}</td>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">${participant.score}</td>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-900">${participant.correct_answers}/${participant.total_questions}</td>
-                                <td class="px-6 py-4 whitespace-nowrap">
-                                    <span class="px-2 inline-flex text-xs leading-5 font-semibold rounded-full ${statusClass}">
-                                        ${status}
-                                    </span>
-                                </td>
-                                <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                                    ${new Date(participant.created_at).toLocaleDateString('hi-IN')}
-                                </td>
-                            `;
-                            tbody.appendChild(row);
-                        });
-                    }
-                } catch (error) {
-                    console.error('Error loading data:', error);
-                }
-            }
-
-            async function sendEmails() {
-                const quizUrl = document.getElementById('quiz-url').value.trim();
-                const emailText = document.getElementById('email-list').value.trim();
-                const statusDiv = document.getElementById('email-status');
-                
-                if (!quizUrl || !emailText) {
-                    statusDiv.innerHTML = '<div class="text-red-600">कृपया URL और ईमेल पते दर्ज करें।</div>';
-                    return;
-                }
-                
-                const emails = emailText.split('\\n').map(email => email.trim()).filter(email => email);
-                
-                if (emails.length === 0) {
-                    statusDiv.innerHTML = '<div class="text-red-600">कोई वैध ईमेल पता नहीं मिला।</div>';
-                    return;
-                }
-                
-                statusDiv.innerHTML = '<div class="text-blue-600">ईमेल भेजे जा रहे हैं...</div>';
-                
-                try {
-                    const response = await fetch('/api/quiz/send-quiz-email', {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json',
-                        },
-                        body: JSON.stringify({
-                            emails: emails,
-                            quiz_url: quizUrl
-                        })
-                    });
-                    
-                    const data = await response.json();
-                    
-                    if (data.success) {
-                        statusDiv.innerHTML = `
-                            <div class="text-green-600">
-                                <p>✅ ${data.sent_count} ईमेल सफलतापूर्वक भेजे गए</p>
-                                ${data.failed_count > 0 ? `<p class="text-red-600">❌ ${data.failed_count} ईमेल भेजने में असफल</p>` : ''}
-                            </div>
-                        `;
-                    } else {
-                        statusDiv.innerHTML = `<div class="text-red-600">त्रुटि: ${data.error}</div>`;
-                    }
-                } catch (error) {
-                    statusDiv.innerHTML = `<div class="text-red-600">नेटवर्क त्रुटि: ${error.message}</div>`;
-                }
-            }
-        </script>
-    </body>
-    </html>
-    """
-    return render_template_string(dashboard_html)
+    return static_assets.respond(template_cache.page('admin/dashboard.html'))
 
+
+
+@admin_bp.route('/rescore', methods=['POST'])
+def rescore_submissions():
+    """Reload the answer key and regrade every stored submission"""
+    try:
+        bank = reload_question_bank()
+        # Results still queued are regraded with the new key as they are flushed, here
+        # and in other workers; wait for this process's so the sweep below sees them
+        submission_queue.wait_idle()
+        rescored = rescore_all(bank)
+        # Every session's caches are rebuilt lazily from the regraded rows
+        stats_caches.clear()
+        leaderboards.clear()
+        data_version.bump()
+        event_broker.publish('resync', {})
+        
+        return jsonify({
+            'success': True,
+            'rescored': rescored,
+            'message': f'{rescored} प्रविष्टियों का पुनर्मूल्यांकन किया गया'
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/quizzes', methods=['GET'])
+def get_quizzes():
+    """List quizzes"""
+    try:
+        return jsonify({'success': True, 'quizzes': [q.to_dict() for q in Quiz.query.order_by(Quiz.id).all()]})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/quizzes', methods=['POST'])
+def add_quiz():
+    """Create a quiz that sessions can be scheduled for"""
+    try:
+        data = request.get_json()
+        title = data.get('title', '').strip()
+        if not title:
+            return jsonify({'success': False, 'error': 'शीर्षक आवश्यक है'}), 400
+        
+        quiz = Quiz(title=title, description=data.get('description'))
+        db.session.add(quiz)
+        db.session.commit()
+        return jsonify({'success': True, 'quiz': quiz.to_dict()}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/sessions', methods=['GET'])
+def get_sessions():
+    """List every session, newest first"""
+    try:
+        rows = QuizSession.query.order_by(QuizSession.id.desc()).all()
+        return jsonify({
+            'success': True,
+            'active_session_id': sessions.active_session_id(),
+            'sessions': [row.to_dict() for row in rows]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/sessions', methods=['POST'])
+def add_session():
+    """Open a new session; it becomes the active session for new registrations"""
+    try:
+        data = request.get_json()
+        name = data.get('name', '').strip()
+        if not name:
+            return jsonify({'success': False, 'error': 'सत्र का नाम आवश्यक है'}), 400
+        
+        quiz_id = data.get('quiz_id')
+        if quiz_id is None:
+            quiz_id = db.session.query(db.func.min(Quiz.id)).scalar()
+        session = create_session(quiz_id, name)
+        return jsonify({'success': True, 'session': session.to_dict()}), 201
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/sessions/<int:session_id>/close', methods=['POST'])
+def close_quiz_session(session_id):
+    """Stop accepting registrations and submits for a session"""
+    try:
+        session = close_session(session_id)
+        data_version.bump(session_id)
+        return jsonify({'success': True, 'session': session.to_dict()})
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/sessions/<int:session_id>/archive', methods=['POST'])
+def archive_quiz_session(session_id):
+    """Move a closed session's participants to the archive table"""
+    try:
+        # Results this process accepted must reach the table before it is moved
+        submission_queue.wait_idle()
+        progress_buffer.flush()
+        archived = archive_session(session_id)
+        stats_caches.discard(session_id)
+        leaderboards.discard(session_id)
+        data_version.bump(session_id)
+        submission_receipts.clear()
+        return jsonify({
+            'success': True,
+            'archived': archived,
+            'message': f'{archived} प्रतिभागी संग्रहित किए गए'
+        })
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+IMPORT_FORMATS = {
+    'csv': iter_csv_records,
+    'json': iter_json_records,
+}
+
+@admin_bp.route('/participants/import', methods=['POST'])
+def import_participants():
+    """Pre-register a roster from a CSV or JSON upload, with a per-row error report"""
+    try:
+        # A multipart form with a "file" field, or the roster as the raw request body
+        upload = request.files.get('file') if request.mimetype == 'multipart/form-data' else None
+        stream = upload.stream if upload else request.stream
+        filename = (upload.filename or '') if upload else ''
+        
+        import_format = request.args.get('format')
+        if import_format is None:
+            is_json = filename.lower().endswith(('.json', '.jsonl', '.ndjson')) or (
+                not upload and 'json' in (request.mimetype or '')
+            )
+            import_format = 'json' if is_json else 'csv'
+        if import_format not in IMPORT_FORMATS:
+            return jsonify({'success': False, 'error': 'अमान्य फ़ाइल प्रारूप'}), 400
+        
+        session = sessions.resolve(request.args.get('session_id', type=int))
+        if session['status'] != 'open':
+            return jsonify({'success': False, 'error': 'यह सत्र बंद हो चुका है'}), 409
+        
+        report = import_roster(IMPORT_FORMATS[import_format](stream), session['id'])
+        data_version.bump(session['id'])
+        stats = stats_caches.get(session['id'])
+        stats.invalidate()
+        if event_broker.has_subscribers:
+            event_broker.publish('stats', stats.get(), session['id'])
+        if 'error' in report:
+            # The rows before the unreadable record were imported; the report says how far it got
+            return jsonify({'success': False, 'session_id': session['id'], **report}), 400
+        return jsonify({
+            'success': True,
+            'session_id': session['id'],
+            **report,
+            'message': f'{report["imported"]} प्रतिभागी आयात किए गए'
+        })
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),  # Werkzeug adds charset=utf-8 to text/* mimetypes
+    'xlsx': (iter_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+@admin_bp.route('/export')
+def export_participants():
+    """Stream participants, optionally of one ?session_id=, with per-question answers as CSV or XLSX"""
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': 'अमान्य निर्यात प्रारूप'}), 400
+    
+    writer, mimetype = EXPORT_FORMATS[export_format]
+    filename = f'participants-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}'
+    return Response(
+        stream_with_context(writer(iter_export_rows(request.args.get('session_id', type=int)))),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@admin_bp.route('/item-analysis')
+def get_item_analysis():
+    """Per-question difficulty, discrimination and distractor frequencies"""
+    try:
+        return jsonify({'success': True, **item_analysis(request.args.get('session_id', type=int))})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@admin_bp.route('/stream')
+def stream_events():
+    """Server-Sent Events feed of a session's registrations, submissions, stats and leaderboard"""
+    try:
+        session_id = sessions.resolve(request.args.get('session_id', type=int))['id']
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    
+    subscription = event_broker.subscribe(session_id)
+    if subscription is None:
+        return jsonify({'success': False, 'error': 'बहुत अधिक लाइव कनेक्शन'}), 503, {'Retry-After': '30'}
+    
+    try:
+        initial = [
+            ('stats', stats_caches.get(session_id).get()),
+            ('leaderboard', leaderboards.get(session_id).top(LEADERBOARD_EVENT_SIZE))
+        ]
+        activity = session_activity(session_id)
+    except Exception as e:
+        subscription.close()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    app = current_app._get_current_object()
+    
+    def generate():
+        nonlocal activity
+        try:
+            yield 'retry: 3000\n\n'
+            yield ''.join(format_event(event, data) for event, data in initial)
+            checked_at = time.monotonic()
+            while True:
+                pending = subscription.drain(min(SSE_KEEPALIVE, SSE_RESYNC_INTERVAL))
+                if time.monotonic() - checked_at >= SSE_RESYNC_INTERVAL:
+                    # Writes handled by other workers never reach this process's broker
+                    checked_at = time.monotonic()
+                    with app.app_context():
+                        current = session_activity(session_id)
+                    if current != activity:
+                        activity = current
+                        pending.append(('resync', {}))
+                if pending:
+                    yield ''.join(format_event(event, data) for event, data in pending)
+                else:
+                    yield ': keepalive\n\n'
+        finally:
+            subscription.close()
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
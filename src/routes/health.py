@@ -1,4 +1,6 @@
-from flask import Blueprint
+from flask import Blueprint, Response, jsonify
+from src.services.metrics import request_metrics
+from src.startup import startup_timer
 
 health_bp = Blueprint('health', __name__)
 
@@ -7,3 +9,22 @@ def health_check():
     """Health check endpoint for Render"""
     return {'status': 'healthy', 'service': 'hindi-quiz-backend'}, 200
 
+@health_bp.route('/health/startup')
+def startup_report():
+    """How long this worker took to become ready, by startup phase"""
+    return jsonify(startup_timer.report())
+
+@health_bp.route('/metrics')
+def metrics():
+    """Per-route request metrics for this worker in the Prometheus text format"""
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@health_bp.route('/metrics/profiles')
+def slow_request_profiles():
+    """Sampled stacks of recent slow requests; empty unless METRICS_PROFILE_SLOW_MS is set"""
+    profiler = request_metrics.profiler
+    return jsonify({
+        'success': True,
+        'enabled': profiler is not None,
+        'profiles': list(profiler.profiles) if profiler else []
+    })
@@ -1,59 +1,133 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app
 from src.models.user import db
 from src.models.participant import Participant
+from src.models.quiz import QuizSession
+from src.models.email_job import EmailJobState
+from src.services.stats import stats_caches
+from src.services.leaderboard import leaderboards
+from src.services.sessions import sessions, SessionError
+from src.services.templates import template_cache
+from src.services.delivery import question_delivery
+from src.services.static_assets import static_assets
+from src.services.http_cache import data_version, response_cache
+from src.services.scoring import get_question_bank, UNANSWERED
+from src.services.submissions import submission_queue
+from src.services.progress import progress_buffer, parse_progress, merge_answers, ProgressError
+from src.services.idempotency import submission_receipts, submission_key
+from src.services.events import event_broker, LEADERBOARD_EVENT_SIZE
+from src.services.rate_limit import (
+    rate_limiter, admission, client_ip, REGISTER_IP_LIMIT, REGISTER_EMAIL_LIMIT,
+    SUBMIT_IP_LIMIT, SUBMIT_PARTICIPANT_LIMIT, PROGRESS_PARTICIPANT_LIMIT
+)
+from urllib.parse import urlencode
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import os
+import base64
+import json
 
 quiz_bp = Blueprint('quiz', __name__)
 
+# Default projection for list views; the answers blob is only loaded on request
+LIST_FIELDS = tuple(f for f in Participant.FIELDS if f != 'answers')
+serialize_participant = Participant.serializer(Participant.FIELDS)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+INVITATION_FIELDS = ('name', 'quiz_link')
+DEFAULT_RECIPIENT_NAME = 'प्रतिभागी'
+
+def _encode_cursor(created_at, participant_id):
+    raw = json.dumps([created_at.isoformat(), participant_id])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode('ascii'))
+    created_at, participant_id = json.loads(raw)
+    return datetime.fromisoformat(created_at), int(participant_id)
+
+def _personal_link(quiz_url, email):
+    # Lets the quiz page prefill the recipient's email
+    separator = '&' if '?' in quiz_url else '?'
+    return f'{quiz_url}{separator}{urlencode({"email": email})}'
+
+def _request_session():
+    """The session named by ?session_id=, defaulting to the active session"""
+    return sessions.resolve(request.args.get('session_id', type=int))
+
 @quiz_bp.route('/participants', methods=['GET'])
+@response_cache
 def get_participants():
-    """Get all participants with their scores"""
+    """Get one page of a session's participants, newest first, using keyset pagination"""
     try:
-        participants = Participant.query.order_by(Participant.created_at.desc()).all()
+        session = _request_session()
+        fields_param = request.args.get('fields')
+        if fields_param:
+            fields = tuple(f.strip() for f in fields_param.split(',') if f.strip())
+            unknown = [f for f in fields if f not in Participant.FIELDS]
+            if unknown:
+                return jsonify({'success': False, 'error': f'अमान्य फ़ील्ड: {", ".join(unknown)}'}), 400
+        else:
+            fields = LIST_FIELDS
+
+        limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+
+        # id and created_at are always selected so the next cursor can be built
+        columns = fields + tuple(f for f in ('created_at', 'id') if f not in fields)
+        query = db.session.query(*[getattr(Participant, f) for f in columns]).filter(
+            Participant.session_id == session['id']
+        )
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor_created_at, cursor_id = _decode_cursor(cursor)
+            except (ValueError, TypeError):
+                return jsonify({'success': False, 'error': 'अमान्य कर्सर'}), 400
+            query = query.filter(
+                db.tuple_(Participant.created_at, Participant.id) < (cursor_created_at, cursor_id)
+            )
+
+        # Fetch one extra row to learn whether another page exists
+        rows = query.order_by(
+            Participant.created_at.desc(),
+            Participant.id.desc()
+        ).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]._mapping
+            next_cursor = _encode_cursor(last['created_at'], last['id'])
+
+        serialize = Participant.serializer(fields)
         return jsonify({
             'success': True,
-            'participants': [p.to_dict() for p in participants],
-            'total_count': len(participants)
+            'participants': [serialize(row) for row in rows],
+            'count': len(rows),
+            'next_cursor': next_cursor,
+            'has_more': has_more
         })
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @quiz_bp.route('/participants/stats', methods=['GET'])
+@response_cache
 def get_participant_stats():
-    """Get participant statistics"""
+    """Get participant statistics for a session"""
     try:
-        total_participants = Participant.query.count()
-        completed_participants = Participant.query.filter(Participant.completed_at.isnot(None)).count()
-        
-        if completed_participants > 0:
-            avg_score = db.session.query(db.func.avg(Participant.score)).filter(
-                Participant.completed_at.isnot(None)
-            ).scalar() or 0
-            
-            highest_score = db.session.query(db.func.max(Participant.score)).filter(
-                Participant.completed_at.isnot(None)
-            ).scalar() or 0
-        else:
-            avg_score = 0
-            highest_score = 0
-        
+        session = _request_session()
         return jsonify({
             'success': True,
-            'stats': {
-                'total_participants': total_participants,
-                'completed_participants': completed_participants,
-                'average_score': round(avg_score, 2),
-                'highest_score': highest_score
-            }
+            'stats': stats_caches.get(session['id']).get()
         })
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @quiz_bp.route('/participants', methods=['POST'])
+@admission
 def register_participant():
     """Register a new participant"""
     try:
@@ -61,182 +135,364 @@ def register_participant():
         name = data.get('name', '').strip()
         department = data.get('department', '').strip()
         post = data.get('post', '').strip()
-        email = data.get('email', '').strip()
+        email = data.get('email', '').strip().lower()
         mobile = data.get('mobile', '').strip()
         
+        limited = rate_limiter.check('register', [
+            ('ip', client_ip(), REGISTER_IP_LIMIT),
+            ('email', email, REGISTER_EMAIL_LIMIT)
+        ])
+        if limited:
+            return limited
+        
         if not all([name, department, post, email, mobile]):
             return jsonify({'success': False, 'error': 'सभी फ़ील्ड आवश्यक हैं'}), 400
         
-        # Check if participant already exists
-        existing = Participant.query.filter_by(email=email).first()
-        if existing:
-            return jsonify({'success': False, 'error': 'यह ईमेल पहले से पंजीकृत है'}), 400
+        session = sessions.resolve(data.get('session_id'))
+        if session['status'] != 'open':
+            return jsonify({'success': False, 'error': 'यह सत्र बंद हो चुका है'}), 409
+        session_id = session['id']
         
-        participant = Participant(
+        # The unique (session, email) index rejects duplicates atomically, so
+        # there is no separate existence check to race against
+        row = Participant.insert_if_new(
+            session_id=session_id,
             name=name, 
             department=department,
             post=post,
             email=email, 
-            mobile=mobile
+            mobile=mobile,
+            total_questions=len(get_question_bank())
         )
-        db.session.add(participant)
-        db.session.commit()
+        if row is None:
+            return jsonify({'success': False, 'error': 'यह ईमेल पहले से पंजीकृत है'}), 400
+        data_version.bump(session_id)
+        stats = stats_caches.get(session_id)
+        stats.record_registration(row.id)
+        
+        participant = serialize_participant(row)
+        if event_broker.has_subscribers:
+            event_broker.publish('registration', {f: participant[f] for f in LIST_FIELDS}, session_id)
+            event_broker.publish('stats', stats.get(), session_id)
         
         return jsonify({
             'success': True,
-            'participant': participant.to_dict(),
+            'participant': participant,
             'message': 'प्रतिभागी सफलतापूर्वक पंजीकृत'
         })
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@quiz_bp.route('/participants/<int:participant_id>/questions', methods=['GET'])
+def get_participant_questions(participant_id):
+    """A participant's shuffled questions and options, without the answer key"""
+    try:
+        return static_assets.respond(question_delivery.for_participant(participant_id))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+def _publish_submission(session_id, entry, previous_rank):
+    event_broker.publish('submission', entry, session_id)
+    event_broker.publish('stats', stats_caches.get(session_id).get(), session_id)
+    # The top of the board only changes if this participant entered or left it
+    top = leaderboards.get(session_id).top(LEADERBOARD_EVENT_SIZE)
+    was_on_top = previous_rank is not None and previous_rank[0] <= LEADERBOARD_EVENT_SIZE
+    if was_on_top or any(e['id'] == entry['id'] for e in top):
+        event_broker.publish('leaderboard', top, session_id)
+
+def _replay_submission(receipt, key):
+    stored_key, body = receipt
+    if stored_key != key:
+        return jsonify({'success': False, 'error': 'परिणाम पहले ही सबमिट किए जा चुके हैं'}), 409
+    return Response(body, mimetype='application/json', headers={'Idempotent-Replayed': 'true'})
+
+def _quiz_in_progress(participant_id):
+    """Session id of a participant who may still answer, or an error response"""
+    session_id = progress_buffer.session_of(participant_id)
+    if session_id is None:
+        row = db.session.query(Participant.session_id, Participant.completed_at).filter(
+            Participant.id == participant_id
+        ).first()
+        if row is None:
+            return None, (jsonify({'success': False, 'error': 'प्रतिभागी नहीं मिला'}), 404)
+        # A receipt marks a submit whose result is still in the submission queue
+        if row.completed_at or submission_receipts.get(participant_id) is not None:
+            return None, (jsonify({'success': False, 'error': 'परिणाम पहले ही सबमिट किए जा चुके हैं'}), 409)
+        session_id = row.session_id
+        progress_buffer.remember(participant_id, session_id)
+    session = sessions.get(session_id)
+    if session is None or session['status'] != 'open':
+        return None, (jsonify({'success': False, 'error': 'यह सत्र बंद हो चुका है'}), 409)
+    return session_id, None
+
+@quiz_bp.route('/participants/<int:participant_id>/progress', methods=['POST'])
+def save_progress(participant_id):
+    """Checkpoint answers while the quiz is in progress; written to the database in batches"""
+    try:
+        limited = rate_limiter.check('progress', [
+            ('participant', participant_id, PROGRESS_PARTICIPANT_LIMIT)
+        ])
+        if limited:
+            return limited
+        
+        time_taken, answers = parse_progress(get_question_bank(), request.get_json(silent=True))
+        _, error = _quiz_in_progress(participant_id)
+        if error:
+            return error
+        
+        progress_buffer.record(participant_id, time_taken, answers)
+        return jsonify({'success': True, 'saved': len(answers)}), 202
+    except ProgressError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@quiz_bp.route('/participants/<int:participant_id>/progress', methods=['GET'])
+def resume_progress(participant_id):
+    """Answers checkpointed so far, for resuming a quiz after a dropped connection"""
+    try:
+        _, error = _quiz_in_progress(participant_id)
+        if error:
+            return error
+        
+        saved = progress_buffer.answers(participant_id)
+        bank = get_question_bank()
+        # In bank order; answers to questions since removed from the bank are dropped
+        answers = [
+            {'questionId': q['id'], 'selectedAnswer': saved[q['id']][0]}
+            for q in bank.questions if q['id'] in saved
+        ]
+        return jsonify({
+            'success': True,
+            'participant_id': participant_id,
+            'total_questions': len(bank),
+            'answered': sum(1 for a in answers if a['selectedAnswer'] is not None),
+            'time_taken': max((seconds for _, seconds in saved.values()), default=0),
+            'answers': answers
+        })
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @quiz_bp.route('/participants/<int:participant_id>/submit', methods=['POST'])
-def submit_quiz_results():
+@admission
+def submit_quiz_results(participant_id):
     """Submit quiz results for a participant"""
     try:
-        data = request.get_json()
-        participant_id = data.get('participant_id')
-        score = data.get('score', 0)
-        correct_answers = data.get('correct_answers', 0)
+        rules = [('participant', participant_id, SUBMIT_PARTICIPANT_LIMIT)]
+        if SUBMIT_IP_LIMIT:
+            rules.append(('ip', client_ip(), SUBMIT_IP_LIMIT))
+        limited = rate_limiter.check('submit', rules)
+        if limited:
+            return limited
+        
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'अमान्य उत्तर प्रारूप'}), 400
         time_taken = data.get('time_taken', 0)
         answers = data.get('answers', [])
+        if not isinstance(answers, list):
+            return jsonify({'success': False, 'error': 'अमान्य उत्तर प्रारूप'}), 400
+        # Stored as-is by the submission flusher, so it must be a plain count of seconds
+        if type(time_taken) is not int or time_taken < 0:
+            return jsonify({'success': False, 'error': 'अमान्य समय'}), 400
+        
+        # Retries of the accepted submit are answered from its stored response
+        key = submission_key(request.headers.get('Idempotency-Key'), data)
+        receipt = submission_receipts.get(participant_id)
+        if receipt is not None:
+            return _replay_submission(receipt, key)
+        
+        # Scores are computed here; client-posted score fields are ignored
+        bank = get_question_bank()
+        score, correct_answers, selections = bank.grade(answers)
+        if UNANSWERED in selections:
+            # Answers checkpointed through /progress need not be uploaded again
+            saved = progress_buffer.answers(participant_id)
+            if saved:
+                score, correct_answers, selections = bank.grade(merge_answers(saved, answers))
+                if 'time_taken' not in data:
+                    time_taken = max(seconds for _, seconds in saved.values())
         
         participant = Participant.query.get(participant_id)
         if not participant:
             return jsonify({'success': False, 'error': 'प्रतिभागी नहीं मिला'}), 404
+        if participant.completed_at:
+            # Flushed by another worker, or completed before receipts were recorded
+            return jsonify({'success': False, 'error': 'परिणाम पहले ही सबमिट किए जा चुके हैं'}), 409
+        session = sessions.get(participant.session_id)
+        if session is None or session['status'] != 'open':
+            return jsonify({'success': False, 'error': 'यह सत्र बंद हो चुका है'}), 409
         
+        # The row is only read here; the write goes through the submission queue
+        db.session.expunge(participant)
         participant.score = score
         participant.correct_answers = correct_answers
+        participant.total_questions = len(bank)
         participant.time_taken = time_taken
-        participant.set_answers(answers)
+        participant.set_answers(bank.stored_answers(selections))
+        participant.selections = bank.pack(selections)
         participant.completed_at = datetime.utcnow()
         
-        db.session.commit()
-        
-        return jsonify({
+        body = current_app.json.dumps({
             'success': True,
-            'participant': participant.to_dict(),
+            'participant': serialize_participant([getattr(participant, f) for f in Participant.FIELDS]),
             'message': 'परिणाम सफलतापूर्वक सबमिट किए गए'
         })
+        # First submit wins: a concurrent duplicate that lost the claim replays the winner
+        if not submission_receipts.claim(participant.id, key, body):
+            return _replay_submission(submission_receipts.get(participant.id), key)
+        
+        try:
+            seq = submission_queue.submit(
+                participant.id,
+                participant.score,
+                participant.correct_answers,
+                participant.total_questions,
+                participant.time_taken,
+                participant.answers,
+                participant.selections,
+                participant.completed_at,
+                participant.session_id,
+                bank.version,
+                {'key': key, 'response': body}
+            )
+        except Exception:
+            # Not recorded anywhere: a replayed receipt would claim a result that is lost
+            submission_receipts.release(participant.id, key)
+            raise
+        
+        # The result is durable from here on; the in-memory views catch up on their next reload
+        try:
+            progress_buffer.complete(participant.id)
+            data_version.bump(participant.session_id)
+            stats_caches.get(participant.session_id).record_submission(participant.score, None, seq)
+            board = leaderboards.get(participant.session_id)
+            previous_rank = board.rank(participant.id) if event_broker.has_subscribers else None
+            entry = board.update(participant)
+            if event_broker.has_subscribers:
+                _publish_submission(participant.session_id, entry, previous_rank)
+        except Exception:
+            current_app.logger.exception('Updating caches after submit of participant %s failed', participant.id)
+        
+        return Response(body, mimetype='application/json')
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @quiz_bp.route('/send-quiz-email', methods=['POST'])
 def send_quiz_email():
-    """Send quiz invitation email to participants"""
+    """Queue quiz invitation emails for background delivery"""
     try:
         data = request.get_json()
-        email_list = data.get('emails', [])
         quiz_url = data.get('quiz_url', 'http://localhost:3000')
+        # Each entry is an email address or {"email": ..., "name": ...}
+        names = {}
+        for entry in data.get('emails', []):
+            if isinstance(entry, dict):
+                names[entry.get('email')] = entry.get('name') or ''
+            else:
+                names[entry] = ''
+        names.pop(None, None)
+        email_list = list(names)
         
         if not email_list:
             return jsonify({'success': False, 'error': 'ईमेल सूची आवश्यक है'}), 400
         
-        # Email configuration (you would need to set up SMTP credentials)
-        smtp_server = "smtp.gmail.com"
-        smtp_port = 587
-        sender_email = os.getenv('SENDER_EMAIL', 'hindiquiz2025@gmail.com')
-        sender_password = os.getenv('SENDER_PASSWORD', 'xixkpodgmeenjtli')
-        
         subject = "हिंदी राजभाषा प्रश्नोत्तरी में भाग लें"
+        invitation = template_cache.slots(
+            'email/quiz_invitation.html', INVITATION_FIELDS, total_questions=len(get_question_bank())
+        )
+        
+        def personalize(email):
+            return invitation.render(
+                name=names[email] or DEFAULT_RECIPIENT_NAME,
+                quiz_link=_personal_link(quiz_url, email)
+            )
         
-        html_body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                <h2 style="color: #ff6600; text-align: center;">हिंदी राजभाषा प्रश्नोत्तरी</h2>
-                
-                <p>नमस्कार,</p>
-                
-                <p>आपको हिंदी राजभाषा, इतिहास और संस्कृति पर आधारित एक रोचक प्रश्नोत्तरी में भाग लेने के लिए आमंत्रित किया जा रहा है।</p>
-                
-                <div style="background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin: 20px 0;">
-                    <h3 style="margin-top: 0; color: #ff6600;">प्रश्नोत्तरी की विशेषताएं:</h3>
-                    <ul>
-                        <li>कुल प्रश्न: 25</li>
-                        <li>समय सीमा: प्रत्येक प्रश्न के लिए 7 सेकंड</li>
-                        <li>अंक प्रणाली: सही उत्तर +3, गलत उत्तर -1</li>
-                        <li>भाषा: हिंदी (देवनागरी)</li>
-                        <li>कोई वापसी विकल्प नहीं</li>
-                    </ul>
-                </div>
-                
-                <div style="text-align: center; margin: 30px 0;">
-                    <a href="{quiz_url}" style="background-color: #ff6600; color: white; padding: 12px 30px; text-decoration: none; border-radius: 5px; font-weight: bold;">प्रश्नोत्तरी शुरू करें</a>
-                </div>
-                
-                <p>कृपया अपना नाम और ईमेल पता सही तरीके से दर्ज करें।</p>
-                
-                <p>शुभकामनाएं!</p>
-                
-                <hr style="margin: 30px 0;">
-                <p style="font-size: 12px; color: #666; text-align: center;">
-                    यह एक स्वचालित ईमेल है। कृपया इसका उत्तर न दें।
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        sent_count = 0
-        failed_emails = []
+        # Progress goes to the email_job table so a poll can reach any worker
+        app = current_app._get_current_object()
+        def save_progress(state):
+            with app.app_context():
+                EmailJobState.save(state)
         
+        # smtplib and email.mime are only imported once someone sends mail
+        from src.services.mailer import email_dispatcher, MailerNotConfigured
         try:
-            server = smtplib.SMTP(smtp_server, smtp_port)
-            server.starttls()
-            server.login(sender_email, sender_password)
-            
-            for email in email_list:
-                try:
-                    msg = MIMEMultipart('alternative')
-                    msg['Subject'] = subject
-                    msg['From'] = sender_email
-                    msg['To'] = email
-                    
-                    html_part = MIMEText(html_body, 'html', 'utf-8')
-                    msg.attach(html_part)
-                    
-                    server.send_message(msg)
-                    sent_count += 1
-                except Exception as e:
-                    failed_emails.append({'email': email, 'error': str(e)})
-            
-            server.quit()
-            
-        except Exception as e:
-            return jsonify({
-                'success': False, 
-                'error': f'ईमेल सर्वर कनेक्शन त्रुटि: {str(e)}'
-            }), 500
+            job = email_dispatcher.submit(subject, personalize, email_list, save_progress)
+        except MailerNotConfigured as e:
+            return jsonify({'success': False, 'error': str(e)}), 503
         
         return jsonify({
             'success': True,
-            'sent_count': sent_count,
-            'failed_count': len(failed_emails),
-            'failed_emails': failed_emails,
-            'message': f'{sent_count} ईमेल सफलतापूर्वक भेजे गए'
-        })
+            'job_id': job.id,
+            'total': job.total,
+            'message': f'{job.total} ईमेल भेजने के लिए कतार में जोड़े गए'
+        }), 202
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@quiz_bp.route('/send-quiz-email/<job_id>', methods=['GET'])
+def get_email_job(job_id):
+    """Get progress and failures of a bulk email job"""
+    try:
+        job = db.session.get(EmailJobState, job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'ईमेल कार्य नहीं मिला'}), 404
+        return jsonify({'success': True, **job.to_dict()})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @quiz_bp.route('/leaderboard', methods=['GET'])
+@response_cache
 def get_leaderboard():
-    """Get top performers leaderboard"""
+    """Get a session's top performers"""
+    try:
+        session = _request_session()
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+        return jsonify({
+            'success': True,
+            'session_id': session['id'],
+            'leaderboard': leaderboards.get(session['id']).top(limit)
+        })
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@quiz_bp.route('/leaderboard/rank/<int:participant_id>', methods=['GET'])
+def get_participant_rank(participant_id):
+    """Get a participant's position on their session's leaderboard"""
     try:
-        top_participants = Participant.query.filter(
-            Participant.completed_at.isnot(None)
-        ).order_by(
-            Participant.score.desc(),
-            Participant.time_taken.asc()
-        ).limit(10).all()
+        session_id = db.session.query(Participant.session_id).filter(Participant.id == participant_id).scalar()
+        result = leaderboards.get(session_id).rank(participant_id) if session_id is not None else None
+        if result is None:
+            return jsonify({'success': False, 'error': 'प्रतिभागी ने प्रश्नोत्तरी पूर्ण नहीं की है'}), 404
         
+        rank, entry, total = result
         return jsonify({
             'success': True,
-            'leaderboard': [p.to_dict() for p in top_participants]
+            'rank': rank,
+            'total_ranked': total,
+            'participant': entry
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@quiz_bp.route('/sessions', methods=['GET'])
+def get_open_sessions():
+    """List sessions open for registration; the active one is used by default"""
+    try:
+        rows = QuizSession.query.filter_by(status='open').order_by(QuizSession.id.desc()).all()
+        return jsonify({
+            'success': True,
+            'active_session_id': sessions.active_session_id(),
+            'sessions': [row.to_dict() for row in rows]
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,64 @@
+"""JSON encoding for API responses.
+
+JSON_PROVIDER selects the encoder: 'orjson' (default) serializes in C and
+writes RawJSON values into the output unchanged, 'default' keeps Flask's
+standard library provider.
+"""
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+import orjson
+import json
+import os
+
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+
+
+class RawJSON:
+    """A value that is already encoded JSON text, e.g. a stored answers column"""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return f'RawJSON({self.text!r})'
+
+
+def _orjson_default(value):
+    if isinstance(value, RawJSON):
+        return orjson.Fragment(value.text)
+    return DefaultJSONProvider.default(value)
+
+
+class OrjsonProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_orjson_default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Bytes go straight into the response without a str round-trip
+        return self._app.response_class(
+            orjson.dumps(obj, default=_orjson_default), mimetype='application/json'
+        )
+
+
+class StandardProvider(DefaultJSONProvider):
+    @staticmethod
+    def default(value):
+        if isinstance(value, RawJSON):
+            return json.loads(value.text)
+        return DefaultJSONProvider.default(value)
+
+
+JSON_PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'default': StandardProvider,
+}
+
+
+def configure_json(app, name=JSON_PROVIDER):
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f'Unknown JSON_PROVIDER {name!r}; expected one of {", ".join(JSON_PROVIDERS)}')
+    app.json = JSON_PROVIDERS[name](app)
@@ -0,0 +1,116 @@
+"""Question delivery without the answer key.
+
+For each loaded question bank, the questions are stripped of their answers
+and frozen into tuples once. QUESTION_VARIANTS shuffles of question and
+option order are then built from them. Each is seeded from the bank's
+content and the variant number, so every worker builds the same ones. Each
+shuffle is encoded to JSON once and kept with its ETag and gzip copy.
+
+A participant's variant is their id modulo QUESTION_VARIANTS, so people who
+register one after another (often sitting together) see different orders.
+Serving a quiz is a lookup: nothing is stored per participant and nothing is
+read from the database.
+
+Options keep their original index as "id". Clients submit that id as
+selectedAnswer, so grading does not depend on the shuffle.
+"""
+from src.services.scoring import get_question_bank
+from src.services.static_assets import StaticAsset, REVALIDATE_CACHE
+from collections import namedtuple
+import threading
+import hashlib
+import random
+import gzip
+import json
+import os
+
+QUESTION_VARIANTS = int(os.getenv('QUESTION_VARIANTS', '64'))
+
+Question = namedtuple('Question', 'id text options')  # options: ((original index, text), ...)
+
+
+def freeze_questions(bank):
+    """The bank's questions without answers, as nested tuples"""
+    return tuple(
+        Question(q['id'], q['question'], tuple(enumerate(q['options'])))
+        for q in bank.questions
+    )
+
+
+def bank_fingerprint(bank):
+    raw = json.dumps(bank.questions, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def shuffle_questions(questions, seed):
+    """One deterministic ordering of the questions and of each question's options"""
+    rng = random.Random(seed)
+    order = list(questions)
+    rng.shuffle(order)
+    shuffled = []
+    for question in order:
+        options = list(question.options)
+        rng.shuffle(options)
+        shuffled.append(Question(question.id, question.text, tuple(options)))
+    return tuple(shuffled)
+
+
+def encode_questions(questions, variant):
+    payload = {
+        'success': True,
+        'variant': variant,
+        'total_questions': len(questions),
+        'questions': [
+            {
+                'id': q.id,
+                'question': q.text,
+                'options': [{'id': index, 'text': text} for index, text in q.options]
+            }
+            for q in questions
+        ]
+    }
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class QuestionDelivery:
+    def __init__(self, variants=QUESTION_VARIANTS):
+        self.variant_count = max(1, variants)
+        self._built = (None, ())  # (bank, encoded variants), swapped in as one tuple
+        self._lock = threading.Lock()
+
+    def for_participant(self, participant_id):
+        """The encoded, shuffled quiz for a participant, as a StaticAsset"""
+        bank, variants = self._built
+        current = get_question_bank()
+        if bank is not current:
+            variants = self._build(current)
+        return variants[participant_id % len(variants)]
+
+    def warm(self):
+        self.for_participant(0)
+
+    def _build(self, bank):
+        with self._lock:
+            built_bank, variants = self._built
+            if built_bank is bank:
+                return variants
+            questions = freeze_questions(bank)
+            fingerprint = bank_fingerprint(bank)
+            variants = tuple(
+                self._encode(shuffle_questions(questions, f'{fingerprint}:{n}'), n)
+                for n in range(self.variant_count)
+            )
+            self._built = (bank, variants)
+            return variants
+
+    @staticmethod
+    def _encode(questions, variant):
+        content = encode_questions(questions, variant)
+        asset = StaticAsset(f'questions/{variant}.json', content,
+                            {'gzip': gzip.compress(content, compresslevel=6, mtime=0)})
+        # Same URL, new content after a bank reload: clients revalidate with the ETag
+        asset.cache_control = REVALIDATE_CACHE
+        return asset
+
+
+question_delivery = QuestionDelivery()
@@ -0,0 +1,99 @@
+"""In-process pub/sub feeding the admin dashboard's Server-Sent Events stream.
+
+Discrete events (a registration, a submission) are queued per subscriber up
+to a bound; a subscriber that falls behind is told to resync instead of
+growing without limit. State snapshots (stats, leaderboard) are coalesced so
+a subscriber only ever holds the latest one. Publishing is O(subscribers) and
+never touches the database.
+
+Each worker process has its own broker, so a stream only sees the events
+handled by the worker it is connected to. To cover the others, the stream
+checks the session's activity in the table every SSE_RESYNC_INTERVAL seconds
+and sends resync when it has moved, and the dashboard refetches.
+"""
+from collections import deque
+import threading
+import json
+import os
+
+SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '200'))
+SSE_MAX_SUBSCRIBERS = int(os.getenv('SSE_MAX_SUBSCRIBERS', '4'))  # per process; each holds a thread
+SSE_KEEPALIVE = 15  # seconds between comment lines on an idle stream
+SSE_RESYNC_INTERVAL = float(os.getenv('SSE_RESYNC_INTERVAL', '15'))  # seconds between activity checks
+LEADERBOARD_EVENT_SIZE = 10
+
+COALESCED_EVENTS = ('stats', 'leaderboard', 'resync')
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+class Subscription:
+    def __init__(self, broker, maxsize, session_id):
+        self.broker = broker
+        self.maxsize = maxsize
+        self.session_id = session_id
+        self._events = deque()
+        self._latest = {}
+        self._cond = threading.Condition()
+
+    def push(self, event, data):
+        with self._cond:
+            if event in COALESCED_EVENTS:
+                self._latest[event] = data
+            elif len(self._events) >= self.maxsize:
+                # Too far behind: drop the backlog and have the client refetch
+                self._events.clear()
+                self._latest['resync'] = {}
+            else:
+                self._events.append((event, data))
+            self._cond.notify()
+
+    def drain(self, timeout):
+        """Wait up to timeout for events and return everything pending"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._events or self._latest, timeout)
+            pending = list(self._events) + list(self._latest.items())
+            self._events.clear()
+            self._latest.clear()
+            return pending
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    def __init__(self, queue_size=SSE_QUEUE_SIZE, max_subscribers=SSE_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, session_id):
+        """Return a new subscription to one session, or None when the process is at capacity"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(self, self.queue_size, session_id)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, event, data, session_id=None):
+        """Deliver to the session's subscribers, or to every subscriber when session_id is None"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if session_id is None or subscription.session_id == session_id:
+                subscription.push(event, data)
+
+
+event_broker = EventBroker()
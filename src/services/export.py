@@ -0,0 +1,170 @@
+"""Streaming participant exports.
+
+Rows are read with yield_per so the database driver streams them (a
+server-side cursor on PostgreSQL) and each format is produced by a generator,
+so memory stays flat and the first bytes go out before the query finishes.
+
+Participant-supplied text that a spreadsheet would read as a formula is
+prefixed with an apostrophe in both formats.
+"""
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.scoring import get_question_bank, UNANSWERED
+from xml.sax.saxutils import escape
+import zipfile
+import json
+import csv
+import io
+
+EXPORT_FIELDS = tuple(f for f in Participant.FIELDS if f != 'answers')
+EXPORT_BATCH_SIZE = 1000
+FLUSH_BYTES = 64 * 1024
+# Leading characters that make Excel and LibreOffice evaluate a cell
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def spreadsheet_text(value):
+    """Quote text that would otherwise be evaluated as a formula (CSV injection)"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_export_rows(session_id=None):
+    """Yield the header, then one flat row per participant with per-question selections"""
+    bank = get_question_bank()
+    yield list(EXPORT_FIELDS) + [f'Q{q["id"]}' for q in bank.questions]
+
+    columns = [getattr(Participant, f) for f in EXPORT_FIELDS] + [Participant.answers]
+    query = db.select(*columns)
+    if session_id is not None:
+        query = query.where(Participant.session_id == session_id)
+    result = db.session.execute(
+        query.order_by(Participant.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for row in result:
+        values = [v.isoformat() if hasattr(v, 'isoformat') else v for v in row[:-1]]
+        answers = json.loads(row[-1]) if row[-1] else []
+        # Options are shown 1-based, blank when the question was not answered
+        selections = bank.selections(answers) if isinstance(answers, list) else []
+        yield values + ['' if s == UNANSWERED else s + 1 for s in selections]
+
+
+def iter_csv(rows):
+    buffer = io.StringIO()
+    # BOM so Excel detects UTF-8 and renders Devanagari correctly
+    buffer.write('\ufeff')
+    writer = csv.writer(buffer)
+    rows = iter(rows)
+    # The header goes out on its own so the download starts immediately
+    writer.writerow(next(rows))
+    yield buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow(['' if v is None else spreadsheet_text(v) for v in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _ZipStream:
+    """Write-only, non-seekable sink; zipfile falls back to data descriptors"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Participants" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(spreadsheet_text(str(value)))}</t></is></c>'
+
+
+def iter_xlsx(rows):
+    """Stream a single-sheet workbook using inline strings, one row at a time"""
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield sink.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            pending = []
+            pending_size = 0
+            for row in rows:
+                line = '<row>' + ''.join(_xlsx_cell(v) for v in row) + '</row>'
+                pending.append(line)
+                pending_size += len(line)
+                if pending_size >= FLUSH_BYTES:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending = []
+                    pending_size = 0
+                    yield sink.drain()
+            sheet.write(''.join(pending).encode('utf-8'))
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
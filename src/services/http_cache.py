@@ -0,0 +1,152 @@
+"""Conditional GET and gzip for the polled JSON endpoints.
+
+DataVersion counts writes per session, plus a global count for writes that
+touch every session. Registration, submit, the submission flusher and the
+admin writers bump it. Views wrapped in @response_cache derive a weak ETag
+from the version. A poll whose If-None-Match still matches gets 304 without
+running the view or touching the database. After a write the view runs once
+per URL. Its body, and a gzip copy when the body is at least GZIP_MIN_SIZE,
+are then reused for every client until the next write.
+
+Counters live in the worker process. Writes handled by another worker show
+up here when the tag's time epoch rolls over, every DATA_VERSION_MAX_AGE
+seconds, the same staleness the stats cache already accepts. Every tag
+carries a per-process token, so one worker's tag never matches on another.
+
+Other JSON responses are gzipped per request once they reach GZIP_MIN_SIZE
+and the client accepts it.
+"""
+from flask import Response, current_app, request
+from src.services.sessions import sessions, SessionError
+from collections import OrderedDict
+from functools import wraps
+import threading
+import uuid
+import gzip
+import time
+import os
+
+DATA_VERSION_MAX_AGE = float(os.getenv('DATA_VERSION_MAX_AGE', os.getenv('STATS_CACHE_TTL', '5')))
+GZIP_MIN_SIZE = int(os.getenv('GZIP_MIN_SIZE', '1024'))
+GZIP_LEVEL = 6
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+
+
+class DataVersion:
+    def __init__(self, max_age=DATA_VERSION_MAX_AGE):
+        self.max_age = max_age
+        self._token = None
+        self._token_pid = None
+        self._global = 0
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def bump(self, session_id=None):
+        """Record a write to one session, or to every session when session_id is None"""
+        with self._lock:
+            if session_id is None:
+                self._global += 1
+            else:
+                self._sessions[session_id] = self._sessions.get(session_id, 0) + 1
+
+    def etag(self, session_id):
+        epoch = int(time.monotonic() // self.max_age) if self.max_age > 0 else 0
+        return f'{self._process_token()}.{self._global}.{self._sessions.get(session_id, 0)}.{epoch}'
+
+    def _process_token(self):
+        # Made in the process that serves, not at import: gunicorn's master
+        # imports the app before forking, and workers must not share a token
+        pid = os.getpid()
+        if self._token_pid != pid:
+            self._token = uuid.uuid4().hex[:8]
+            self._token_pid = pid
+        return self._token
+
+
+data_version = DataVersion()
+
+
+def _gzip_accepted():
+    return bool(request.accept_encodings['gzip'])
+
+
+class ResponseCache:
+    """Decorator serving a session-scoped JSON view from its last body while the data version holds"""
+
+    def __init__(self, version, max_entries=RESPONSE_CACHE_SIZE):
+        self.version = version
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # full path -> [tag, body, gzip body or None, mimetype]
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.after_request(compress_json)
+
+    def __call__(self, view):
+        @wraps(view)
+        def cached(*args, **kwargs):
+            try:
+                session_id = sessions.resolve(request.args.get('session_id', type=int))['id']
+            except SessionError:
+                return view(*args, **kwargs)
+
+            # Taken before the view runs, so a stored body is never older than its tag
+            tag = self.version.etag(session_id)
+            headers = {'ETag': f'W/"{tag}"', 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+            if request.if_none_match.contains_weak(tag):
+                return Response(status=304, headers=headers)
+
+            key = request.full_path
+            entry = self._get(key, tag)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = [tag, response.get_data(), None, response.mimetype]
+                self._put(key, entry)
+
+            _, body, compressed, mimetype = entry
+            if len(body) >= GZIP_MIN_SIZE and _gzip_accepted():
+                if compressed is None:
+                    # Compressed on first demand, then shared until the next write
+                    compressed = entry[2] = gzip.compress(body, GZIP_LEVEL, mtime=0)
+                headers['Content-Encoding'] = 'gzip'
+                body = compressed
+            return Response(body, mimetype=mimetype, headers=headers)
+        return cached
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key, tag):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != tag:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def compress_json(response):
+    """after_request hook: gzip a large JSON body when the client accepts it"""
+    if (response.status_code != 200 or response.is_streamed or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers or not _gzip_accepted()):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, GZIP_LEVEL, mtime=0))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+response_cache = ResponseCache(data_version)
@@ -0,0 +1,106 @@
+"""Idempotent quiz submission.
+
+The first accepted submit for a participant wins: its response is replayed
+for retries. A retry is recognised by its Idempotency-Key header or, without
+one, by a hash of the payload; a different submit for an already-submitted
+participant gets 409.
+
+A submit is claimed in this process's memory and its receipt travels with
+the result through the submission queue, so the submission_receipt row is
+written by the flusher in the same transaction as the result. Claims not
+yet flushed are pinned; flushed receipts are kept in a bounded LRU with a
+TTL, so a client retrying on timeouts is answered without the database.
+Two workers racing on one participant both accept; the first to flush is
+the one stored, and the other's result is dropped by apply_results.
+"""
+from src.models.user import db
+from src.models.submission_receipt import SubmissionReceipt
+from collections import OrderedDict
+import threading
+import hashlib
+import json
+import time
+import os
+
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000'))
+IDEMPOTENCY_CACHE_TTL = float(os.getenv('IDEMPOTENCY_CACHE_TTL', '900'))  # seconds
+MAX_KEY_LENGTH = 255
+
+
+def submission_key(header_key, data):
+    """Hash the client's Idempotency-Key, or the submitted payload when there is none"""
+    if header_key:
+        source = 'key:' + header_key[:MAX_KEY_LENGTH]
+    else:
+        payload = {'answers': data.get('answers', []), 'time_taken': data.get('time_taken', 0)}
+        source = 'payload:' + json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+class ReceiptStore:
+    def __init__(self, max_size=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._cache = OrderedDict()
+        self._pending = {}  # participant id -> (key, response) claimed but not yet flushed
+        self._lock = threading.Lock()
+
+    def get(self, participant_id):
+        """Return (key, response) of the accepted submit, or None"""
+        now = time.monotonic()
+        with self._lock:
+            if participant_id in self._pending:
+                return self._pending[participant_id]
+            cached = self._cache.get(participant_id)
+            if cached is not None:
+                if now - cached[2] < self.ttl:
+                    self._cache.move_to_end(participant_id)
+                    return cached[0], cached[1]
+                del self._cache[participant_id]
+
+        row = db.session.query(SubmissionReceipt.key, SubmissionReceipt.response).filter(
+            SubmissionReceipt.participant_id == participant_id
+        ).first()
+        if row is None:
+            return None
+        self._remember(participant_id, row.key, row.response)
+        return row.key, row.response
+
+    def claim(self, participant_id, key, response):
+        """Hold the receipt until it is flushed, unless another submit got there first; True if this one won"""
+        with self._lock:
+            if participant_id in self._pending or participant_id in self._cache:
+                return False
+            self._pending[participant_id] = (key, response)
+            return True
+
+    def release(self, participant_id, key):
+        """Give up a claim whose result could not be recorded, so a retry can submit again"""
+        with self._lock:
+            if self._pending.get(participant_id, (None,))[0] == key:
+                del self._pending[participant_id]
+
+    def flushed(self, participant_ids):
+        """Unpin claims whose results the submission queue has written.
+
+        Retries read the stored receipt back from the table, which holds
+        another worker's if that one flushed first.
+        """
+        with self._lock:
+            for participant_id in participant_ids:
+                self._pending.pop(participant_id, None)
+
+    def clear(self):
+        """Forget flushed receipts; they are read back from the table when needed"""
+        with self._lock:
+            self._cache.clear()
+
+    def _remember(self, participant_id, key, response):
+        with self._lock:
+            self._cache[participant_id] = (key, response, time.monotonic())
+            self._cache.move_to_end(participant_id)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+
+submission_receipts = ReceiptStore()
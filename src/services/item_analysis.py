@@ -0,0 +1,85 @@
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.scoring import get_question_bank, UNANSWERED
+import numpy as np
+import json
+
+# Share of participants in each of the upper and lower groups for the
+# discrimination index (Kelley's 27% rule)
+DISCRIMINATION_GROUP = 0.27
+
+
+def load_selection_matrix(bank, session_id=None):
+    """Selection matrix of every completed submission, read from the packed column.
+
+    Returns (matrix, skipped). Rows packed for a bank of another length, or
+    written before the packed column existed, are decoded from their JSON
+    answers instead; rows with no readable answers either are skipped.
+    """
+    scope = [Participant.completed_at.isnot(None)]
+    if session_id is not None:
+        scope.append(Participant.session_id == session_id)
+    misfit = db.or_(Participant.selections.is_(None), db.func.length(Participant.selections) != len(bank))
+    packed = [row[0] for row in db.session.query(Participant.selections).filter(*scope, ~misfit)]
+    legacy = []
+    skipped = 0
+    for (answers,) in db.session.query(Participant.answers).filter(*scope, misfit):
+        try:
+            readable = isinstance(json.loads(answers), list) if answers else False
+        except ValueError:
+            readable = False
+        if readable:
+            legacy.append(answers)
+        else:
+            skipped += 1
+    matrix = bank.selection_matrix(packed + [None] * len(legacy), [None] * len(packed) + legacy)
+    return matrix, skipped
+
+
+def analyze(bank, matrix):
+    """Per-question difficulty, discrimination index and option frequencies"""
+    participants = matrix.shape[0]
+    correct = matrix == bank.answer_key
+    scores, _ = bank.grade_matrix(matrix)
+
+    if participants:
+        difficulty = correct.mean(axis=0)
+        group = max(1, int(round(participants * DISCRIMINATION_GROUP)))
+        order = np.argsort(scores, kind='stable')
+        discrimination = correct[order[-group:]].mean(axis=0) - correct[order[:group]].mean(axis=0)
+    else:
+        difficulty = np.zeros(len(bank))
+        discrimination = None
+
+    max_options = max(len(q['options']) for q in bank.questions)
+    option_counts = np.stack([(matrix == option).sum(axis=0) for option in range(max_options)], axis=1)
+    unanswered = (matrix == UNANSWERED).sum(axis=0)
+
+    items = []
+    for position, question in enumerate(bank.questions):
+        counts = option_counts[position]
+        items.append({
+            'question_id': question['id'],
+            'question': question['question'],
+            'correct_option': question['correct'],
+            'difficulty': round(float(difficulty[position]), 4),
+            'discrimination': None if discrimination is None else round(float(discrimination[position]), 4),
+            'unanswered': int(unanswered[position]),
+            'options': [
+                {
+                    'option': index,
+                    'text': text,
+                    'count': int(counts[index]),
+                    'share': round(int(counts[index]) / participants, 4) if participants else 0,
+                    'correct': index == question['correct']
+                }
+                for index, text in enumerate(question['options'])
+            ]
+        })
+    return {'participants': participants, 'items': items}
+
+
+def item_analysis(session_id=None):
+    bank = get_question_bank()
+    matrix, skipped = load_selection_matrix(bank, session_id)
+    return {**analyze(bank, matrix), 'skipped': skipped}
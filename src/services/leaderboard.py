@@ -0,0 +1,184 @@
+from flask import has_app_context
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.scoring import get_question_bank
+from src.services.sessions import PerSession
+from src.services.submissions import submission_queue, SUBMISSION_FLUSH_INTERVAL
+from sortedcontainers import SortedList
+import threading
+import time
+import os
+
+# Submits handled by other worker processes only show up after a rebuild.
+# Every LEADERBOARD_CHECK_INTERVAL seconds the session's completed count and
+# the answer key version are compared with this board, and a mismatch
+# rebuilds it; the table is rescanned regardless once the snapshot is older
+# than LEADERBOARD_REFRESH_INTERVAL seconds
+LEADERBOARD_REFRESH_INTERVAL = float(os.getenv('LEADERBOARD_REFRESH_INTERVAL', '30'))
+LEADERBOARD_CHECK_INTERVAL = float(os.getenv('LEADERBOARD_CHECK_INTERVAL', '1'))
+# A rank asked for right after a submit on another worker can arrive before
+# that worker's flusher wrote it; a miss waits this long for the row to complete
+LEADERBOARD_MISS_WAIT = float(os.getenv('LEADERBOARD_MISS_WAIT', '0.5'))
+LEADERBOARD_FIELDS = tuple(f for f in Participant.FIELDS if f != 'answers')
+QUEUED_RESULT_FIELDS = ('score', 'correct_answers', 'total_questions', 'time_taken', 'completed_at')
+
+
+def _rank_key(entry):
+    # Higher score first, then faster time, then earlier registration
+    return (-(entry['score'] or 0), entry['time_taken'] or 0, entry['id'])
+
+
+class Leaderboard:
+    """One session's completed participants ordered by (-score, time_taken, id)"""
+
+    def __init__(self, session_id, refresh_interval=LEADERBOARD_REFRESH_INTERVAL,
+                 check_interval=LEADERBOARD_CHECK_INTERVAL):
+        self.session_id = session_id
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._keys = SortedList()
+        self._entries = {}
+        self._loaded_at = None
+        self._checked_at = 0.0
+        self._bank_version = None  # answer key the loaded scores were graded with
+        self._rebuilding = False
+        self._updated_during_rebuild = {}
+
+    def rebuild(self):
+        """Reload every completed participant of the session, including results still queued"""
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            self._rebuilding = True
+            self._updated_during_rebuild = {}
+        try:
+            bank_version = get_question_bank().version
+            with submission_queue.snapshot() as (queued, _):
+                queued = {r['participant_id']: r for r in queued if r.get('session_id') == self.session_id}
+                completed = Participant.completed_at.isnot(None)
+                if queued:
+                    completed = db.or_(completed, Participant.id.in_(queued))
+                rows = db.session.query(
+                    *[getattr(Participant, f) for f in LEADERBOARD_FIELDS]
+                ).filter(Participant.session_id == self.session_id, completed).all()
+            entries = {}
+            for row in rows:
+                entry = Participant.row_to_dict(row, LEADERBOARD_FIELDS)
+                record = queued.get(entry['id'])
+                if record is not None:
+                    entry.update((f, record[f]) for f in QUEUED_RESULT_FIELDS)
+                entries[entry['id']] = entry
+
+            with self._lock:
+                # Submits accepted while the table was read may be in neither source
+                entries.update(self._updated_during_rebuild)
+                self._entries = entries
+                self._keys = SortedList(_rank_key(e) for e in entries.values())
+                self._loaded_at = self._checked_at = time.monotonic()
+                self._bank_version = bank_version
+        finally:
+            with self._lock:
+                self._rebuilding = False
+                self._updated_during_rebuild = {}
+
+    def update(self, participant):
+        """Insert or move a participant after their results were accepted; returns the entry"""
+        entry = Participant.row_to_dict(
+            [getattr(participant, f) for f in LEADERBOARD_FIELDS], LEADERBOARD_FIELDS
+        )
+        self._ensure_fresh()
+        with self._lock:
+            previous = self._entries.get(entry['id'])
+            if previous is not None:
+                self._keys.remove(_rank_key(previous))
+            self._entries[entry['id']] = entry
+            self._keys.add(_rank_key(entry))
+            if self._rebuilding:
+                self._updated_during_rebuild[entry['id']] = entry
+        return entry
+
+    def top(self, limit):
+        self._ensure_fresh()
+        with self._lock:
+            return [self._entries[key[2]] for key in self._keys.islice(0, limit)]
+
+    def rank(self, participant_id):
+        """Return (rank, entry, total) or None if the participant has not completed"""
+        self._ensure_fresh()
+        with self._lock:
+            entry = self._entries.get(participant_id)
+        if entry is None:
+            # Possibly completed through another worker since the last check
+            entry = self._load_completed(participant_id)
+            if entry is None:
+                return None
+        with self._lock:
+            return self._keys.index(_rank_key(entry)) + 1, entry, len(self._keys)
+
+    def _load_completed(self, participant_id):
+        """Add a participant whose result is in the table but not on this board; returns the entry"""
+        if not has_app_context():
+            return None
+        deadline = time.monotonic() + LEADERBOARD_MISS_WAIT
+        while True:
+            row = db.session.query(
+                *[getattr(Participant, f) for f in LEADERBOARD_FIELDS]
+            ).filter(Participant.id == participant_id, Participant.session_id == self.session_id).first()
+            db.session.commit()  # a new transaction, so the next read sees other workers' flushes
+            if row is None:
+                return None
+            entry = Participant.row_to_dict(row, LEADERBOARD_FIELDS)
+            if entry['completed_at'] is not None:
+                break
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(SUBMISSION_FLUSH_INTERVAL)
+        with self._lock:
+            # A concurrent update or rebuild may have added it meanwhile
+            if participant_id not in self._entries:
+                self._entries[participant_id] = entry
+                self._keys.add(_rank_key(entry))
+                if self._rebuilding:
+                    self._updated_during_rebuild[participant_id] = entry
+            return self._entries[participant_id]
+
+    def _is_current(self):
+        """Whether every completed row of the session, and the answer key in force, is on this board"""
+        # Also picks up a key published by another worker
+        if get_question_bank().version != self._bank_version:
+            return False
+        with submission_queue.snapshot() as (queued, _):
+            completed = db.session.query(db.func.count(Participant.id)).filter(
+                Participant.session_id == self.session_id,
+                Participant.completed_at.isnot(None)
+            ).scalar()
+        # Results queued here are on the board but not yet in the table
+        queued = sum(1 for record in queued if record.get('session_id') == self.session_id)
+        with self._lock:
+            return len(self._entries) == completed + queued
+
+    def _ensure_fresh(self):
+        loaded_at = self._loaded_at
+        now = time.monotonic()
+        if loaded_at is not None and now - loaded_at < self.refresh_interval:
+            if now - self._checked_at < self.check_interval or not has_app_context():
+                return
+            self._checked_at = now
+            if self._is_current():
+                return
+        # One thread rebuilds; the others keep serving the current snapshot,
+        # and only wait when there is none yet
+        if not self._rebuild_lock.acquire(blocking=loaded_at is None):
+            return
+        try:
+            if self._loaded_at == loaded_at:
+                self._rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+
+leaderboards = PerSession(Leaderboard)
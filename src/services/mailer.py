@@ -0,0 +1,242 @@
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+import smtplib
+import threading
+import queue
+import uuid
+import time
+import os
+
+SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '587'))
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', '1') != '0'
+# Set from the environment (secrets on Render); without them no mail is sent
+SENDER_EMAIL = os.getenv('SENDER_EMAIL', '')
+SENDER_PASSWORD = os.getenv('SENDER_PASSWORD', '')
+
+# Number of persistent SMTP connections, and the shared send rate across all of them
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', '4'))
+SMTP_RATE_LIMIT = float(os.getenv('SMTP_RATE_LIMIT', '10'))  # messages per second
+SMTP_MAX_ATTEMPTS = int(os.getenv('SMTP_MAX_ATTEMPTS', '3'))
+SMTP_RETRY_BACKOFF = float(os.getenv('SMTP_RETRY_BACKOFF', '2'))  # seconds, doubled per attempt
+SMTP_IDLE_TIMEOUT = 30  # close a worker's connection after this long without work
+JOB_PROGRESS_INTERVAL = 1.0  # seconds between progress reports of a running job
+
+
+class MailerNotConfigured(RuntimeError):
+    """SENDER_EMAIL or SENDER_PASSWORD is not set"""
+
+
+class RateLimiter:
+    """Token bucket shared by all workers"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(rate, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class EmailJob:
+    """Progress of one bulk send"""
+
+    def __init__(self, subject, html_body, recipients, on_progress=None):
+        self.id = uuid.uuid4().hex
+        self.subject = subject
+        # A fixed HTML part is encoded once and shared by every message in the
+        # job; a callable builds each recipient's own body when it is sent
+        self.personalize = html_body if callable(html_body) else None
+        self.html_part = None if self.personalize else MIMEText(html_body, 'html', 'utf-8')
+        self.total = len(recipients)
+        self.recipients = recipients
+        self.sent_count = 0
+        self.failed_emails = []
+        self.created_at = time.time()
+        self.finished_at = None
+        # Called with to_dict() as the job is queued, at most every
+        # JOB_PROGRESS_INTERVAL while it runs, and once it is done
+        self.on_progress = on_progress
+        self._reported_at = None
+        self._lock = threading.Lock()
+        self._report_lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.sent_count + len(self.failed_emails) >= self.total
+
+    def build_message(self, sender, recipient):
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = self.subject
+        msg['From'] = sender
+        msg['To'] = recipient
+        if self.personalize:
+            msg.attach(MIMEText(self.personalize(recipient), 'html', 'utf-8'))
+        else:
+            msg.attach(self.html_part)
+        return msg
+
+    def record_sent(self):
+        with self._lock:
+            self.sent_count += 1
+            self._check_finished()
+        self.report()
+
+    def record_failure(self, recipient, error):
+        with self._lock:
+            self.failed_emails.append({'email': recipient, 'error': error})
+            self._check_finished()
+        self.report()
+
+    def report(self):
+        if self.on_progress is None:
+            return
+        # Serialized, and each report takes a fresh snapshot, so the last one written is the newest
+        with self._report_lock:
+            now = time.monotonic()
+            if (self._reported_at is not None and not self.done
+                    and now - self._reported_at < JOB_PROGRESS_INTERVAL):
+                return
+            self._reported_at = now
+            try:
+                self.on_progress(self.to_dict())
+            except Exception:
+                pass  # delivery goes on; the next report retries
+
+    def _check_finished(self):
+        if self.done and self.finished_at is None:
+            self.finished_at = time.time()
+
+    def to_dict(self):
+        with self._lock:
+            failed = list(self.failed_emails)
+            sent = self.sent_count
+        pending = self.total - sent - len(failed)
+        return {
+            'job_id': self.id,
+            'status': 'completed' if pending == 0 else ('running' if sent or failed else 'queued'),
+            'total': self.total,
+            'sent_count': sent,
+            'failed_count': len(failed),
+            'pending_count': pending,
+            'failed_emails': failed
+        }
+
+
+class EmailDispatcher:
+    """Worker pool that drains queued emails over persistent SMTP connections"""
+
+    def __init__(self, host=SMTP_SERVER, port=SMTP_PORT, sender=SENDER_EMAIL,
+                 password=SENDER_PASSWORD, use_tls=SMTP_USE_TLS, pool_size=SMTP_POOL_SIZE,
+                 rate_limit=SMTP_RATE_LIMIT, max_attempts=SMTP_MAX_ATTEMPTS,
+                 retry_backoff=SMTP_RETRY_BACKOFF):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.use_tls = use_tls
+        self.pool_size = pool_size
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.rate_limiter = RateLimiter(rate_limit)
+        self._queue = queue.Queue()
+        self._workers = []
+        self._start_lock = threading.Lock()
+
+    def submit(self, subject, html_body, recipients, on_progress=None):
+        """Queue a bulk send and return its job without waiting for delivery.
+
+        html_body is the shared HTML, or a function of the recipient's address
+        returning that recipient's HTML. on_progress receives the job's
+        to_dict() as it progresses (see EmailJob). Raises MailerNotConfigured
+        when there are no sender credentials.
+        """
+        if not (self.sender and self.password):
+            raise MailerNotConfigured('ईमेल भेजने के लिए SENDER_EMAIL और SENDER_PASSWORD सेट नहीं हैं')
+        job = EmailJob(subject, html_body, recipients, on_progress)
+        if on_progress is not None:
+            # Made before any worker can send; unlike later reports, a failure here is raised
+            on_progress(job.to_dict())
+        self._ensure_workers()
+        for recipient in recipients:
+            self._queue.put((job, recipient, 1))
+        return job
+
+    def _ensure_workers(self):
+        with self._start_lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.pool_size:
+                worker = threading.Thread(target=self._worker_loop, daemon=True,
+                                          name=f'email-worker-{len(self._workers)}')
+                worker.start()
+                self._workers.append(worker)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        server.ehlo()
+        if self.use_tls and server.has_extn('starttls'):
+            server.starttls()
+            server.ehlo()
+        if self.password and server.has_extn('auth'):
+            server.login(self.sender, self.password)
+        return server
+
+    def _worker_loop(self):
+        server = None
+        while True:
+            try:
+                job, recipient, attempt = self._queue.get(timeout=SMTP_IDLE_TIMEOUT)
+            except queue.Empty:
+                server = self._close(server)
+                continue
+
+            self.rate_limiter.acquire()
+            try:
+                if server is None:
+                    server = self._connect()
+                server.send_message(job.build_message(self.sender, recipient))
+                job.record_sent()
+            except smtplib.SMTPRecipientsRefused as e:
+                job.record_failure(recipient, str(e))
+            except (smtplib.SMTPException, OSError) as e:
+                # Drop the connection; the next message reconnects
+                server = self._close(server)
+                permanent = isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+                if permanent or attempt >= self.max_attempts:
+                    job.record_failure(recipient, str(e))
+                else:
+                    self._retry_later(job, recipient, attempt)
+            except Exception as e:
+                job.record_failure(recipient, str(e))
+            finally:
+                self._queue.task_done()
+
+    def _retry_later(self, job, recipient, attempt):
+        delay = self.retry_backoff * (2 ** (attempt - 1))
+        timer = threading.Timer(delay, self._queue.put, args=((job, recipient, attempt + 1),))
+        timer.daemon = True
+        timer.start()
+
+    @staticmethod
+    def _close(server):
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+        return None
+
+
+email_dispatcher = EmailDispatcher()
@@ -0,0 +1,265 @@
+"""Per-route request instrumentation.
+
+Every request records wall time, SQL statement count and time (from
+SQLAlchemy cursor events), JSON encoding time and response size, aggregated
+per (method, route rule). Totals are rendered in the Prometheus text format
+by /metrics and, when METRICS_SERVER_TIMING is set, sent back on each
+response as a Server-Timing header. Background flushers count the errors
+they retry past in quiz_background_errors_total, by task. Counters live in
+the worker process, so each gunicorn worker reports its own series.
+
+METRICS_PROFILE_SLOW_MS turns on a sampling profiler: the stacks of running
+requests are sampled every METRICS_PROFILE_INTERVAL_MS, and requests slower
+than the threshold keep their collapsed stacks for /metrics/profiles.
+"""
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from collections import Counter, deque
+import threading
+import time
+import sys
+import os
+
+METRICS_SERVER_TIMING = os.getenv('METRICS_SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+METRICS_PROFILE_SLOW_MS = float(os.getenv('METRICS_PROFILE_SLOW_MS', '0'))  # 0 disables profiling
+METRICS_PROFILE_INTERVAL_MS = float(os.getenv('METRICS_PROFILE_INTERVAL_MS', '5'))
+METRICS_PROFILE_KEEP = 20
+PROFILE_TOP_STACKS = 25
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RouteStats:
+    __slots__ = ('requests', 'statuses', 'buckets', 'seconds', 'sql_queries', 'sql_seconds',
+                 'serialize_seconds', 'response_bytes')
+
+    def __init__(self):
+        self.requests = 0
+        self.statuses = Counter()
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.seconds = 0.0
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.response_bytes = 0
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight request threads from a background thread"""
+
+    def __init__(self, threshold_ms, interval_ms=METRICS_PROFILE_INTERVAL_MS, keep=METRICS_PROFILE_KEEP):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.profiles = deque(maxlen=keep)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True, name='request-profiler')
+                    self._thread.start()
+        samples = Counter()
+        with self._lock:
+            self._active[threading.get_ident()] = samples
+        return samples
+
+    def end(self, samples, duration, route):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+        if duration < self.threshold or not samples:
+            return
+        self.profiles.append({
+            'method': request.method,
+            'route': route,
+            'path': request.full_path.rstrip('?'),
+            'duration_ms': round(duration * 1000, 2),
+            'samples': sum(samples.values()),
+            'interval_ms': self.interval * 1000,
+            # Collapsed stacks, root first: the input format of flamegraph tools
+            'stacks': [{'stack': stack, 'count': count} for stack, count in samples.most_common(PROFILE_TOP_STACKS)]
+        })
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[_collapse(frame)] += 1
+
+
+def _collapse(frame):
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+
+class RequestMetrics:
+    def __init__(self, server_timing=METRICS_SERVER_TIMING, profile_slow_ms=METRICS_PROFILE_SLOW_MS):
+        self.server_timing = server_timing
+        self.profiler = SlowRequestProfiler(profile_slow_ms) if profile_slow_ms > 0 else None
+        self._routes = {}
+        self._background_errors = Counter()  # task name -> errors
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        self._time_json(app)
+        if not self._listening:
+            # Listening on the Engine class covers every engine the app creates
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            self._listening = True
+
+    def _time_json(self, app):
+        encode = app.json.response
+
+        def response(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return encode(*args, **kwargs)
+            finally:
+                if has_request_context() and 'metrics_start' in g:
+                    g.metrics_serialize += time.perf_counter() - start
+        app.json.response = response
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        g.metrics_sql_queries = 0
+        g.metrics_sql_seconds = 0.0
+        g.metrics_serialize = 0.0
+        g.metrics_samples = self.profiler.begin() if self.profiler else None
+
+    def _after_request(self, response):
+        if 'metrics_start' not in g:
+            return response
+        duration = time.perf_counter() - g.metrics_start
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        # Measuring a streamed body would buffer it, which never ends for the SSE feed
+        size = 0 if response.is_streamed else response.calculate_content_length() or 0
+        self._record(request.method, route, response.status_code, duration, size)
+        if g.metrics_samples is not None:
+            self.profiler.end(g.metrics_samples, duration, route)
+            g.metrics_samples = None
+
+        if self.server_timing:
+            app_ms = (duration - g.metrics_sql_seconds - g.metrics_serialize) * 1000
+            response.headers['Server-Timing'] = (
+                f'total;dur={duration * 1000:.2f}, app;dur={app_ms:.2f}, '
+                f'db;dur={g.metrics_sql_seconds * 1000:.2f};desc="{g.metrics_sql_queries} queries", '
+                f'json;dur={g.metrics_serialize * 1000:.2f}'
+            )
+        g.pop('metrics_start')
+        return response
+
+    def _teardown_request(self, exc):
+        # Requests that raised never reach after_request; stop sampling their thread
+        samples = g.pop('metrics_samples', None)
+        if samples is not None:
+            self.profiler.end(samples, 0, None)
+
+    def _record(self, method, route, status, duration, size):
+        key = (method, route)
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = RouteStats()
+            stats.requests += 1
+            stats.statuses[status] += 1
+            stats.seconds += duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+                    break
+            stats.sql_queries += g.metrics_sql_queries
+            stats.sql_seconds += g.metrics_sql_seconds
+            stats.serialize_seconds += g.metrics_serialize
+            stats.response_bytes += size
+
+    def record_background_error(self, task):
+        """Count an error raised in a background task such as a flusher"""
+        with self._lock:
+            self._background_errors[task] += 1
+
+    def render(self):
+        """Render every series in the Prometheus text exposition format"""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            snapshot = [(key, stats.statuses.copy(), list(stats.buckets), stats.seconds, stats.requests,
+                         stats.sql_queries, stats.sql_seconds, stats.serialize_seconds, stats.response_bytes)
+                        for key, stats in routes]
+            background_errors = sorted(self._background_errors.items())
+
+        lines = [
+            '# HELP quiz_http_requests_total Requests handled, by route and status.',
+            '# TYPE quiz_http_requests_total counter',
+        ]
+        for (method, route), statuses, *_ in snapshot:
+            for status, count in sorted(statuses.items()):
+                lines.append(f'quiz_http_requests_total{{{_labels(method, route)},status="{status}"}} {count}')
+
+        lines += [
+            '# HELP quiz_http_request_duration_seconds Wall time from before_request to after_request.',
+            '# TYPE quiz_http_request_duration_seconds histogram',
+        ]
+        for (method, route), _, buckets, seconds, requests, *_ in snapshot:
+            labels = _labels(method, route)
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, buckets):
+                cumulative += count
+                lines.append(f'quiz_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'quiz_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {requests}')
+            lines.append(f'quiz_http_request_duration_seconds_sum{{{labels}}} {seconds:.6f}')
+            lines.append(f'quiz_http_request_duration_seconds_count{{{labels}}} {requests}')
+
+        counters = (
+            ('quiz_http_sql_queries_total', 'SQL statements executed while handling requests.', 5, '{}'),
+            ('quiz_http_sql_seconds_total', 'Time spent executing SQL statements.', 6, '{:.6f}'),
+            ('quiz_http_serialize_seconds_total', 'Time spent encoding JSON responses.', 7, '{:.6f}'),
+            ('quiz_http_response_bytes_total', 'Response body bytes, excluding streamed responses.', 8, '{}'),
+        )
+        for name, help_text, index, fmt in counters:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            for row in snapshot:
+                (method, route) = row[0]
+                lines.append(f'{name}{{{_labels(method, route)}}} {fmt.format(row[index])}')
+
+        lines += [
+            '# HELP quiz_background_errors_total Errors raised in background tasks, which retry.',
+            '# TYPE quiz_background_errors_total counter',
+        ]
+        for task, count in background_errors:
+            lines.append(f'quiz_background_errors_total{{task="{task}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(method, route):
+    route = route.replace('\\', '\\\\').replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_start' in g:
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if starts and has_request_context() and 'metrics_start' in g:
+        g.metrics_sql_queries += 1
+        g.metrics_sql_seconds += time.perf_counter() - starts.pop()
+
+
+request_metrics = RequestMetrics()
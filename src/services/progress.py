@@ -0,0 +1,206 @@
+"""Per-question progress checkpoints, so a quiz survives a dropped connection.
+
+Answers posted to /participants/<id>/progress are kept in this process's
+buffer, where repeated answers to one question collapse into the latest.
+Every PROGRESS_FLUSH_INTERVAL seconds the buffer is written to
+answer_progress as one batched upsert, so a crash loses at most that
+interval. Participants who submitted have their rows deleted in the same
+transaction.
+
+Rows are keyed by (participant, question), so two workers saving answers for
+one participant never overwrite each other. Resume reads the rows and lays
+this process's unflushed answers over them; answers buffered by another
+worker appear after its next flush. The final submit grades the saved
+answers together with whatever the request itself carries.
+"""
+from src.models.user import db
+from src.models.participant import Participant
+from src.models.progress import AnswerProgress
+from src.services.metrics import request_metrics
+from sqlalchemy.exc import IntegrityError
+from collections import OrderedDict
+from datetime import datetime
+import threading
+import atexit
+import time
+import os
+
+PROGRESS_FLUSH_INTERVAL = int(os.getenv('PROGRESS_FLUSH_INTERVAL_MS', '2000')) / 1000
+PROGRESS_CACHE_SIZE = int(os.getenv('PROGRESS_CACHE_SIZE', '10000'))
+MAX_PROGRESS_ANSWERS = 200  # per request; more than any question bank holds
+
+
+class ProgressError(ValueError):
+    """A progress update could not be parsed against the question bank"""
+
+
+def parse_progress(bank, data):
+    """Validate a progress payload; returns (time_taken, [(question_id, selected or None), ...]).
+
+    The payload holds "answers" as a list, or a single questionId and
+    selectedAnswer. A selectedAnswer of null clears the question.
+    """
+    if not isinstance(data, dict):
+        raise ProgressError('अमान्य उत्तर प्रारूप')
+    answers = data.get('answers', [data])
+    if not isinstance(answers, list) or not answers or len(answers) > MAX_PROGRESS_ANSWERS:
+        raise ProgressError('अमान्य उत्तर प्रारूप')
+    time_taken = data.get('time_taken', 0)
+    if type(time_taken) is not int or time_taken < 0:
+        time_taken = 0
+
+    parsed = []
+    for answer in answers:
+        if type(answer) is not dict:
+            raise ProgressError('अमान्य उत्तर प्रारूप')
+        question_id = answer.get('questionId')
+        position = bank.positions.get(question_id)
+        if position is None:
+            raise ProgressError('अमान्य प्रश्न')
+        selected = answer.get('selectedAnswer')
+        if selected is not None and not (
+            type(selected) is int and 0 <= selected < len(bank.questions[position]['options'])
+        ):
+            raise ProgressError('अमान्य उत्तर')
+        parsed.append((question_id, selected))
+    return time_taken, parsed
+
+
+def merge_answers(saved, answers):
+    """Saved progress overlaid with a submitted answers list, in submit format"""
+    merged = {question_id: selected for question_id, (selected, _) in saved.items()}
+    for answer in answers:
+        if type(answer) is dict and 'questionId' in answer:
+            merged[answer['questionId']] = answer.get('selectedAnswer')
+    return [{'questionId': question_id, 'selectedAnswer': selected} for question_id, selected in merged.items()]
+
+
+class ProgressBuffer:
+    """Write-behind buffer between the progress endpoint and the answer_progress table"""
+
+    def __init__(self, flush_interval=PROGRESS_FLUSH_INTERVAL, cache_size=PROGRESS_CACHE_SIZE):
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.app = None
+        self._pending = {}  # participant id -> {question id: (selected, time_taken)}
+        self._flushing = {}  # the batch being written, still visible to readers
+        self._finished = set()  # participants whose rows the next flush deletes
+        self._sessions = OrderedDict()  # participant id -> session id, for quizzes in progress
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self._thread = threading.Thread(target=self._run, daemon=True, name='progress-flusher')
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def session_of(self, participant_id):
+        """Session of a participant known to be mid-quiz, or None if not cached"""
+        with self._lock:
+            session_id = self._sessions.get(participant_id)
+            if session_id is not None:
+                self._sessions.move_to_end(participant_id)
+            return session_id
+
+    def remember(self, participant_id, session_id):
+        with self._lock:
+            self._sessions[participant_id] = session_id
+            self._sessions.move_to_end(participant_id)
+            while len(self._sessions) > self.cache_size:
+                self._sessions.popitem(last=False)
+
+    def record(self, participant_id, time_taken, answers):
+        """Buffer (question id, selected) pairs; a later answer to a question replaces the earlier"""
+        with self._lock:
+            pending = self._pending.setdefault(participant_id, {})
+            for question_id, selected in answers:
+                pending[question_id] = (selected, time_taken)
+
+    def answers(self, participant_id):
+        """{question id: (selected, time_taken)} from the table, overlaid with unflushed answers"""
+        saved = AnswerProgress.for_participant(participant_id)
+        with self._lock:
+            saved.update(self._flushing.get(participant_id, ()))
+            saved.update(self._pending.get(participant_id, ()))
+        return saved
+
+    def complete(self, participant_id):
+        """Forget a submitted participant; their rows are deleted on the next flush"""
+        with self._lock:
+            self._pending.pop(participant_id, None)
+            self._sessions.pop(participant_id, None)
+            self._finished.add(participant_id)
+
+    def flush(self):
+        """Write buffered answers and delete finished participants in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending and not self._finished:
+                    return 0
+                batch, self._pending = self._pending, {}
+                finished, self._finished = self._finished, set()
+                self._flushing = batch
+
+            now = datetime.utcnow()
+            rows = [
+                {
+                    'participant_id': participant_id,
+                    'question_id': question_id,
+                    'selected_answer': selected,
+                    'time_taken': time_taken,
+                    'updated_at': now
+                }
+                for participant_id, answers in batch.items()
+                for question_id, (selected, time_taken) in answers.items()
+            ]
+            try:
+                with self.app.app_context():
+                    try:
+                        self._write(rows, finished)
+                    except IntegrityError:
+                        # A participant was archived meanwhile; their answers have nowhere to go
+                        live = set(db.session.execute(
+                            db.select(Participant.id).where(Participant.id.in_(batch.keys()))
+                        ).scalars())
+                        self._write([row for row in rows if row['participant_id'] in live], finished)
+            except Exception:
+                # Put the batch back under anything recorded since; the next tick retries
+                with self._lock:
+                    for participant_id, answers in batch.items():
+                        if participant_id in self._finished:
+                            continue
+                        newer = self._pending.get(participant_id, {})
+                        self._pending[participant_id] = {**answers, **newer}
+                    self._finished |= finished
+                    self._flushing = {}
+                raise
+            with self._lock:
+                self._flushing = {}
+            return len(rows)
+
+    @staticmethod
+    def _write(rows, finished):
+        try:
+            if rows:
+                AnswerProgress.save_many(rows)
+            if finished:
+                AnswerProgress.discard(finished)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                # The batch was put back; the next tick retries it
+                self.app.logger.exception('Flushing answer progress failed')
+                request_metrics.record_background_error('progress-flusher')
+
+
+progress_buffer = ProgressBuffer()
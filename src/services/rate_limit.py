@@ -0,0 +1,200 @@
+"""Request rate limiting and admission control for the write endpoints.
+
+Each limit is a token bucket written as "<requests>/<seconds>": the bucket
+holds up to <requests> tokens and refills at requests/seconds per second.
+Buckets are keyed per client IP and per email or participant id, so one
+flaky client retrying in a loop is turned away with 429 before it reaches
+the database.
+
+RATE_LIMIT_BACKEND selects where buckets live: 'memory' (per process, the
+default) or 'sqlite', a small file shared by every worker on the host at
+RATE_LIMIT_SQLITE_PATH. If the shared store is busy the request is let
+through rather than failing.
+
+Admission control caps how many write requests a process works on at
+once. Requests beyond ADMISSION_MAX_IN_FLIGHT wait up to
+ADMISSION_WAIT_MS for a slot, then get 503 instead of queueing behind the
+database lock.
+"""
+from flask import request, jsonify
+from functools import wraps
+import threading
+import sqlite3
+import math
+import time
+import os
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_SQLITE_PATH = os.getenv(
+    'RATE_LIMIT_SQLITE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'ratelimit.db')
+)
+# Offices register from behind shared NAT, so per-IP limits are generous;
+# the per-email and per-participant limits are what stop retry storms
+REGISTER_IP_LIMIT = os.getenv('RATE_LIMIT_REGISTER_IP', '120/60')
+REGISTER_EMAIL_LIMIT = os.getenv('RATE_LIMIT_REGISTER_EMAIL', '5/60')
+# Everyone in an office submits when the quiz ends and the client does not
+# retry a 429, so submit has no per-IP limit unless one is configured
+SUBMIT_IP_LIMIT = os.getenv('RATE_LIMIT_SUBMIT_IP', '')
+SUBMIT_PARTICIPANT_LIMIT = os.getenv('RATE_LIMIT_SUBMIT_PARTICIPANT', '5/60')
+# One checkpoint per answer change; well above any real pace through the quiz
+PROGRESS_PARTICIPANT_LIMIT = os.getenv('RATE_LIMIT_PROGRESS_PARTICIPANT', '120/60')
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '6'))
+ADMISSION_WAIT_MS = int(os.getenv('ADMISSION_WAIT_MS', '1000'))
+ADMISSION_RETRY_AFTER = 2  # seconds
+
+MEMORY_PRUNE_INTERVAL = 60  # seconds between sweeps of full, idle buckets
+
+
+def parse_limit(spec):
+    """'120/60' -> (capacity 120, refill 2.0 tokens per second)"""
+    requests, seconds = spec.split('/')
+    capacity = float(requests)
+    return capacity, capacity / float(seconds)
+
+
+def _refill(tokens, updated, now, capacity, rate):
+    if tokens is None:
+        return capacity
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+
+    def take(self, key, capacity, rate):
+        """Take one token; return 0 if allowed, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (None, now))
+            tokens = _refill(tokens, updated, now, capacity, rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+            if now - self._pruned_at >= MEMORY_PRUNE_INTERVAL:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # A bucket idle long enough to have refilled completely is the same as no bucket
+        horizon = now - MEMORY_PRUNE_INTERVAL
+        self._buckets = {k: v for k, v in self._buckets.items() if v[1] >= horizon}
+        self._pruned_at = now
+
+
+class SqliteBackend:
+    """Buckets in a SQLite file so every worker process on the host shares them"""
+
+    def __init__(self, path=RATE_LIMIT_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=0.05, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets '
+                '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens = _refill(row[0] if row else None, row[1] if row else now, now, capacity, rate)
+                wait = 0 if tokens >= 1 else (1 - tokens) / rate
+                connection.execute(
+                    'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                    (key, tokens - 1 if wait == 0 else tokens, now)
+                )
+                self._calls += 1
+                if self._calls % 1000 == 0:
+                    connection.execute('DELETE FROM buckets WHERE updated < ?', (now - MEMORY_PRUNE_INTERVAL * 10,))
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        except sqlite3.OperationalError:
+            # Contended or unavailable store: fail open rather than reject real users
+            return 0
+        return wait
+
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'sqlite': SqliteBackend,
+}
+
+
+class RateLimiter:
+    def __init__(self, backend=RATE_LIMIT_BACKEND, enabled=RATE_LIMIT_ENABLED):
+        if backend not in BACKENDS:
+            raise ValueError(f'Unknown RATE_LIMIT_BACKEND {backend!r}; expected one of {", ".join(BACKENDS)}')
+        self.enabled = enabled
+        self.backend = BACKENDS[backend]()
+        self._limits = {}
+
+    def check(self, scope, rules):
+        """Take a token from each (key kind, value, limit spec) bucket.
+
+        Returns a ready 429 response when any bucket is empty, else None.
+        """
+        if not self.enabled:
+            return None
+        for kind, value, spec in rules:
+            if value in (None, ''):
+                continue
+            limit = self._limits.get(spec)
+            if limit is None:
+                limit = self._limits[spec] = parse_limit(spec)
+            wait = self.backend.take(f'{scope}:{kind}:{value}', *limit)
+            if wait:
+                response = jsonify({'success': False, 'error': 'बहुत अधिक अनुरोध, कृपया कुछ देर बाद पुनः प्रयास करें'})
+                return response, 429, {'Retry-After': str(max(1, math.ceil(wait)))}
+        return None
+
+
+class AdmissionController:
+    """Bounds the write requests a process handles concurrently"""
+
+    def __init__(self, max_in_flight=ADMISSION_MAX_IN_FLIGHT, wait_ms=ADMISSION_WAIT_MS):
+        self.wait = wait_ms / 1000
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def __call__(self, view):
+        @wraps(view)
+        def admitted(*args, **kwargs):
+            if not self._slots.acquire(timeout=self.wait):
+                response = jsonify({'success': False, 'error': 'सर्वर व्यस्त है, कृपया कुछ देर बाद पुनः प्रयास करें'})
+                return response, 503, {'Retry-After': str(ADMISSION_RETRY_AFTER)}
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self._slots.release()
+        return admitted
+
+
+def client_ip():
+    # Behind Render's proxy this is the real client once ProxyFix is enabled
+    return request.remote_addr
+
+
+rate_limiter = RateLimiter()
+admission = AdmissionController()
@@ -0,0 +1,174 @@
+"""Bulk pre-registration of participants from department rosters.
+
+An upload is parsed as it is read: CSV with a header row, or JSON as an
+array of objects or one object per line. Each record is validated like a
+single registration, then checked against the emails already seen in the
+upload and the session's existing emails. Those are loaded in one query
+before parsing starts. Valid rows are inserted IMPORT_CHUNK_SIZE at a time,
+one transaction per chunk, so memory stays flat however long the roster is.
+
+Rows that fail get an entry in the error report with their 1-based record
+number (for CSV, the header is not counted) and the reason. If the upload
+stops parsing part way, the rows before that point are still imported and
+the report carries the parse error and the number of the unreadable record.
+"""
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.scoring import get_question_bank
+import codecs
+import json
+import csv
+import io
+import os
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+READ_SIZE = 64 * 1024
+
+REQUIRED_FIELDS = ('name', 'department', 'post', 'email', 'mobile')
+FIELD_LENGTHS = {f: Participant.__table__.c[f].type.length for f in REQUIRED_FIELDS}
+
+class ImportFormatError(ValueError):
+    """The upload could not be parsed as the declared format"""
+
+
+def iter_csv_records(stream):
+    """Yield (record number, dict) from a CSV byte stream with a header row"""
+    # utf-8-sig drops the BOM Excel writes, as our own export does
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [h.strip().lower() for h in header]
+        for number, values in enumerate(reader, 1):
+            if not any(values):
+                continue
+            yield number, dict(zip(header, values))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f'CSV पढ़ने में त्रुटि: {e}')
+    finally:
+        # The stream belongs to the request; don't let the wrapper close it
+        text.detach()
+
+
+def iter_json_records(stream):
+    """Yield (record number, value) from a JSON array or newline-delimited JSON byte stream"""
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    position = 0
+    number = 0
+    eof = False
+    while True:
+        # Skip what separates records: whitespace, the array brackets and commas
+        while position < len(buffer) and buffer[position] in ' \t\r\n,[]':
+            position += 1
+        if position < len(buffer):
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ImportFormatError(f'JSON पढ़ने में त्रुटि: {e}')
+                value = end = None
+            if end is not None:
+                number += 1
+                yield number, value
+                position = end
+                continue
+        elif eof:
+            return
+
+        # Need more input: keep only the unparsed tail
+        buffer = buffer[position:]
+        position = 0
+        try:
+            chunk = stream.read(READ_SIZE)
+            buffer += reader.decode(chunk, final=not chunk)
+        except UnicodeDecodeError as e:
+            raise ImportFormatError(f'JSON पढ़ने में त्रुटि: {e}')
+        eof = not chunk
+
+
+def validate_record(record):
+    """Normalise one roster record; returns (values, error message or None)"""
+    if not isinstance(record, dict):
+        return None, 'अमान्य पंक्ति'
+    values = {}
+    for field in REQUIRED_FIELDS:
+        value = record.get(field)
+        values[field] = str(value).strip() if value is not None else ''
+    values['email'] = values['email'].lower()
+    if not all(values.values()):
+        return values, 'सभी फ़ील्ड आवश्यक हैं'
+    for field, length in FIELD_LENGTHS.items():
+        if length and len(values[field]) > length:
+            return values, f'{field} अधिकतम {length} अक्षर का हो सकता है'
+    return values, None
+
+
+def import_roster(records, session_id):
+    """Insert validated, de-duplicated records into a session in chunked transactions.
+
+    Returns a report dict with counts and the per-row errors, plus 'error'
+    and 'stopped_at_row' if the records stopped with an ImportFormatError.
+    """
+    existing = set(db.session.execute(
+        db.select(db.func.lower(Participant.email)).where(Participant.session_id == session_id)
+    ).scalars())
+    db.session.commit()  # end the read transaction before the first write
+    total_questions = len(get_question_bank())
+
+    seen = set()
+    errors = []
+    pending = []  # (record number, values) awaiting the next chunk insert
+    total = imported = 0
+    number = 0
+    stopped = None
+
+    def flush():
+        nonlocal imported
+        inserted = Participant.insert_many([values for _, values in pending])
+        imported += len(inserted)
+        # Only a registration racing this import can be skipped here
+        for number, values in pending:
+            if values['email'] not in inserted:
+                errors.append({'row': number, 'email': values['email'], 'error': 'यह ईमेल पहले से पंजीकृत है'})
+        pending.clear()
+
+    try:
+        for number, record in records:
+            total += 1
+            values, error = validate_record(record)
+            if error is None:
+                if values['email'] in seen:
+                    error = 'फ़ाइल में यह ईमेल दोहराया गया है'
+                elif values['email'] in existing:
+                    error = 'यह ईमेल पहले से पंजीकृत है'
+            if error is not None:
+                errors.append({'row': number, 'email': values['email'] if values else None, 'error': error})
+                continue
+
+            seen.add(values['email'])
+            values['session_id'] = session_id
+            values['total_questions'] = total_questions
+            pending.append((number, values))
+            if len(pending) >= IMPORT_CHUNK_SIZE:
+                flush()
+    except ImportFormatError as e:
+        # Earlier chunks are already committed; report how far the upload got
+        stopped = e
+    if pending:
+        flush()
+
+    errors.sort(key=lambda e: e['row'])
+    report = {
+        'total_rows': total,
+        'imported': imported,
+        'failed': len(errors),
+        'errors': errors
+    }
+    if stopped is not None:
+        report['error'] = str(stopped)
+        report['stopped_at_row'] = number + 1
+    return report
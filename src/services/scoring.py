@@ -0,0 +1,202 @@
+from flask import has_app_context
+from src.models.user import db
+from src.models.participant import Participant
+from src.models.quiz import AnswerKey
+import numpy as np
+import json
+import time
+import os
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'questions.json')
+
+# Marking scheme announced in the invitation email
+CORRECT_POINTS = 3
+WRONG_POINTS = -1
+UNANSWERED = -1  # sentinel in the selection matrix
+UNANSWERED_BYTE = 0xFF  # the same sentinel in Participant.selections
+
+RESCORE_BATCH_SIZE = 2000
+# Seconds between checks of the answer_key table for a bank reloaded by another worker
+BANK_CHECK_INTERVAL = float(os.getenv('BANK_CHECK_INTERVAL', '1'))
+
+
+class QuestionBank:
+    """Question bank with its answer key compiled into a NumPy array"""
+
+    def __init__(self, questions, version=0):
+        self.questions = tuple(questions)
+        self.version = version  # answer_key version; 0 is the bundled file
+        self.answer_key = np.array([q['correct'] for q in self.questions], dtype=np.int8)
+        self.positions = {q['id']: i for i, q in enumerate(self.questions)}
+        self._option_counts = [len(q['options']) for q in self.questions]
+
+    @classmethod
+    def load(cls, path=QUESTIONS_PATH):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.questions)
+
+    def selections(self, answers):
+        """Map a submitted answers list onto a list of selected option indexes"""
+        row = [UNANSWERED] * len(self.questions)
+        positions = self.positions
+        option_counts = self._option_counts
+        for answer in answers:
+            if type(answer) is not dict:
+                continue
+            position = positions.get(answer.get('questionId'))
+            selected = answer.get('selectedAnswer')
+            # bool is a subclass of int, so compare the exact type
+            if position is not None and type(selected) is int and 0 <= selected < option_counts[position]:
+                row[position] = selected
+        return row
+
+    def grade_matrix(self, selections):
+        """Score a (participants x questions) selection matrix in one pass"""
+        selections = np.asarray(selections, dtype=np.int8)
+        answered = selections != UNANSWERED
+        correct = selections == self.answer_key
+        correct_counts = correct.sum(axis=1)
+        wrong_counts = (answered & ~correct).sum(axis=1)
+        scores = correct_counts * CORRECT_POINTS + wrong_counts * WRONG_POINTS
+        return scores, correct_counts
+
+    def grade(self, answers):
+        """Score one submission; returns (score, correct_answers, selection row)"""
+        row = self.selections(answers)
+        scores, correct_counts = self.grade_matrix([row])
+        return int(scores[0]), int(correct_counts[0]), row
+
+    def stored_answers(self, row):
+        """Only the participant's selections are stored; grading is derived from the key"""
+        return [
+            {'questionId': q['id'], 'selectedAnswer': None if selected == UNANSWERED else selected}
+            for q, selected in zip(self.questions, row)
+        ]
+
+    def pack(self, row):
+        """Encode a selection row as one byte per question"""
+        return bytes(UNANSWERED_BYTE if selected == UNANSWERED else selected for selected in row)
+
+    def unpack(self, blobs):
+        """Decode packed rows of this bank's length into an int8 selection matrix"""
+        matrix = np.frombuffer(b''.join(blobs), dtype=np.uint8).reshape(len(blobs), len(self.questions))
+        # 0xFF reinterpreted as int8 is -1, i.e. UNANSWERED
+        return matrix.view(np.int8)
+
+    def regrade(self, packed, answers):
+        """Score one stored submission against this bank; returns (score, correct_answers)"""
+        scores, correct_counts = self.grade_matrix(self.selection_matrix([packed], [answers]))
+        return int(scores[0]), int(correct_counts[0])
+
+    def selection_matrix(self, packed_rows, answers_rows):
+        """Build a selection matrix, decoding JSON answers only where no packed row fits"""
+        size = len(self.questions)
+        fits = [packed is not None and len(packed) == size for packed in packed_rows]
+        if all(fits):
+            return self.unpack(packed_rows)
+
+        matrix = np.full((len(packed_rows), size), UNANSWERED, dtype=np.int8)
+        packed_positions = [i for i, fit in enumerate(fits) if fit]
+        if packed_positions:
+            matrix[packed_positions] = self.unpack([packed_rows[i] for i in packed_positions])
+        for i, fit in enumerate(fits):
+            if not fit:
+                answers = answers_rows[i]
+                matrix[i] = self.selections(json.loads(answers) if answers else [])
+        return matrix
+
+
+question_bank = QuestionBank.load()  # reloads publish versions 1, 2, ... in answer_key
+_bank_checked_at = 0.0
+
+
+def reload_question_bank(path=QUESTIONS_PATH):
+    """Re-read the question bank from disk, e.g. after an answer key correction.
+
+    The bank is published as a new answer_key version, which every worker
+    picks up before grading its next submit.
+    """
+    global question_bank, _bank_checked_at
+    with open(path, encoding='utf-8') as f:
+        raw = f.read()
+    questions = json.loads(raw)
+    version = published_version() + 1
+    db.session.add(AnswerKey(version=version, questions=raw))
+    db.session.commit()
+    question_bank, _bank_checked_at = QuestionBank(questions, version), time.monotonic()
+    return question_bank
+
+
+def published_version():
+    """Newest answer_key version; 0 while only the bundled file has been used"""
+    return db.session.query(db.func.max(AnswerKey.version)).scalar() or 0
+
+
+def get_question_bank(refresh=False):
+    """The bank in force, switching to a newer published version at most BANK_CHECK_INTERVAL late.
+
+    refresh checks the answer_key table now, in the caller's transaction.
+    """
+    global question_bank, _bank_checked_at
+    now = time.monotonic()
+    if refresh or (has_app_context() and now - _bank_checked_at >= BANK_CHECK_INTERVAL):
+        _bank_checked_at = now
+        version = published_version()
+        if version > question_bank.version:
+            row = db.session.get(AnswerKey, version)
+            question_bank = QuestionBank(json.loads(row.questions), version)
+    return question_bank
+
+
+def rescore_all(bank=None):
+    """Regrade every completed submission graded with another answer key version.
+
+    Submissions are read in id order in batches and graded as one matrix per
+    batch. They are written back with the bank's version in one executemany
+    UPDATE per batch, so a repeated call only touches rows graded since with
+    an older key. Returns the number of rows whose score changed.
+    """
+    if bank is None:
+        bank = get_question_bank()
+    rescored = 0
+    last_id = 0
+    update = db.update(Participant.__table__).where(
+        Participant.__table__.c.id == db.bindparam('participant_id')
+    ).values(
+        score=db.bindparam('new_score'),
+        correct_answers=db.bindparam('new_correct_answers'),
+        total_questions=len(bank),
+        answer_key_version=bank.version
+    )
+    while True:
+        rows = db.session.query(
+            Participant.id, Participant.selections, Participant.answers, Participant.score,
+            Participant.correct_answers, Participant.total_questions
+        ).filter(
+            Participant.completed_at.isnot(None),
+            db.or_(Participant.answer_key_version.is_(None), Participant.answer_key_version != bank.version),
+            Participant.id > last_id
+        ).order_by(Participant.id).limit(RESCORE_BATCH_SIZE).all()
+        if not rows:
+            break
+
+        selections = bank.selection_matrix([row.selections for row in rows], [row.answers for row in rows])
+        scores, correct_counts = bank.grade_matrix(selections)
+
+        results = list(zip(rows, scores.tolist(), correct_counts.tolist()))
+        # Every row is written, so its version records the key it was graded with
+        db.session.execute(update, [
+            {'participant_id': row.id, 'new_score': score, 'new_correct_answers': correct}
+            for row, score, correct in results
+        ])
+        db.session.commit()
+
+        rescored += sum(
+            (row.score, row.correct_answers, row.total_questions) != (score, correct, len(bank))
+            for row, score, correct in results
+        )
+        last_id = rows[-1].id
+    return rescored
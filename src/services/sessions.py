@@ -0,0 +1,186 @@
+"""Quiz sessions: lookup, lifecycle and archival.
+
+Registrations without an explicit session go to the active session, the
+newest one that is still open. Session rows change rarely, so they are
+cached for SESSION_CACHE_TTL seconds; other workers see a new or closed
+session once their copy expires.
+
+Archiving a closed session moves its participants into participant_archive
+in one transaction, so the hot participant table only holds live sessions.
+"""
+from src.models.user import db
+from src.models.quiz import Quiz, QuizSession
+from src.models.participant import Participant, participant_archive
+from src.models.submission_receipt import SubmissionReceipt
+from src.models.progress import AnswerProgress
+from datetime import datetime
+import threading
+import time
+import os
+
+SESSION_CACHE_TTL = float(os.getenv('SESSION_CACHE_TTL', '5'))
+SESSION_MISS_RELOAD = 1  # seconds; an unknown id reloads at most this often
+DEFAULT_QUIZ_TITLE = 'हिंदी राजभाषा प्रश्नोत्तरी'
+DEFAULT_SESSION_NAME = 'मुख्य सत्र'
+
+ARCHIVE_COLUMNS = tuple(c.name for c in participant_archive.columns if c.name != 'archived_at')
+
+
+class SessionError(ValueError):
+    """A session is missing or in the wrong state for the requested action"""
+
+
+class SessionDirectory:
+    def __init__(self, ttl=SESSION_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._active_id = None
+        self._loaded_at = None
+
+    def _ensure_fresh(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return
+        rows = db.session.query(QuizSession.id, QuizSession.quiz_id, QuizSession.status).filter(
+            QuizSession.status != 'archived'
+        ).all()
+        sessions = {row.id: {'id': row.id, 'quiz_id': row.quiz_id, 'status': row.status} for row in rows}
+        open_ids = [sid for sid, s in sessions.items() if s['status'] == 'open']
+        with self._lock:
+            self._sessions = sessions
+            self._active_id = max(open_ids) if open_ids else None
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def active_session_id(self):
+        self._ensure_fresh()
+        return self._active_id
+
+    def get(self, session_id):
+        """Cached {'id', 'quiz_id', 'status'} of a live session, or None"""
+        self._ensure_fresh()
+        session = self._sessions.get(session_id)
+        loaded_at = self._loaded_at
+        if session is None and (loaded_at is None or time.monotonic() - loaded_at >= SESSION_MISS_RELOAD):
+            # Possibly opened by another worker since the last load
+            self.invalidate()
+            self._ensure_fresh()
+            session = self._sessions.get(session_id)
+        return session
+
+    def resolve(self, session_id=None):
+        """The session a request refers to: the given id, else the active session"""
+        if session_id is None:
+            session_id = self.active_session_id()
+            if session_id is None:
+                raise SessionError('कोई सक्रिय सत्र नहीं है')
+        try:
+            session_id = int(session_id)
+        except (TypeError, ValueError):
+            raise SessionError('अमान्य सत्र')
+        session = self.get(session_id)
+        if session is None:
+            raise SessionError('सत्र नहीं मिला')
+        return session
+
+
+sessions = SessionDirectory()
+
+
+class PerSession:
+    """Lazily created, per-session instances of a cache such as a leaderboard"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        instance = self._instances.get(session_id)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(session_id)
+                if instance is None:
+                    instance = self._instances[session_id] = self.factory(session_id)
+        return instance
+
+    def discard(self, session_id):
+        with self._lock:
+            self._instances.pop(session_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._instances.clear()
+
+
+def ensure_default_session(connection):
+    """Create the default quiz and session if there are none; returns the session id"""
+    session_id = connection.execute(
+        db.select(QuizSession.id).where(QuizSession.status == 'open').order_by(QuizSession.id.desc()).limit(1)
+    ).scalar()
+    if session_id is not None:
+        return session_id
+    quiz_id = connection.execute(db.select(Quiz.id).order_by(Quiz.id).limit(1)).scalar()
+    if quiz_id is None:
+        quiz_id = connection.execute(
+            db.insert(Quiz).values(title=DEFAULT_QUIZ_TITLE, created_at=datetime.utcnow()).returning(Quiz.id)
+        ).scalar()
+    return connection.execute(
+        db.insert(QuizSession).values(
+            quiz_id=quiz_id, name=DEFAULT_SESSION_NAME, status='open', created_at=datetime.utcnow()
+        ).returning(QuizSession.id)
+    ).scalar()
+
+
+def create_session(quiz_id, name):
+    if db.session.get(Quiz, quiz_id) is None:
+        raise SessionError('प्रश्नोत्तरी नहीं मिली')
+    session = QuizSession(quiz_id=quiz_id, name=name, status='open')
+    db.session.add(session)
+    db.session.commit()
+    sessions.invalidate()
+    return session
+
+
+def close_session(session_id):
+    session = db.session.get(QuizSession, session_id)
+    if session is None:
+        raise SessionError('सत्र नहीं मिला')
+    if session.status != 'open':
+        raise SessionError('सत्र पहले से बंद है')
+    session.status = 'closed'
+    session.closed_at = datetime.utcnow()
+    db.session.commit()
+    sessions.invalidate()
+    return session
+
+
+def archive_session(session_id):
+    """Move a closed session's participants to participant_archive; returns the count moved"""
+    session = db.session.get(QuizSession, session_id)
+    if session is None:
+        raise SessionError('सत्र नहीं मिला')
+    if session.status != 'closed':
+        raise SessionError('केवल बंद सत्र संग्रहित किए जा सकते हैं')
+
+    table = Participant.__table__
+    in_session = table.c.session_id == session_id
+    now = datetime.utcnow()
+    db.session.execute(participant_archive.insert().from_select(
+        ARCHIVE_COLUMNS + ('archived_at',),
+        db.select(*[table.c[name] for name in ARCHIVE_COLUMNS], db.literal(now)).where(in_session)
+    ))
+    for dependent in (SubmissionReceipt, AnswerProgress):
+        db.session.execute(db.delete(dependent.__table__).where(
+            dependent.participant_id.in_(db.select(table.c.id).where(in_session))
+        ))
+    moved = db.session.execute(db.delete(table).where(in_session)).rowcount
+    session.status = 'archived'
+    session.archived_at = now
+    db.session.commit()
+    sessions.invalidate()
+    return moved
@@ -0,0 +1,136 @@
+from flask import Response, request
+import mimetypes
+import hashlib
+import gzip
+import re
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Vite emits content-hashed bundle names such as index-CqGLESNx.js
+HASHED_ASSET = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$')
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml',
+                      'image/x-icon', 'image/vnd.microsoft.icon')
+MIN_COMPRESS_SIZE = 1024
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+DEFAULT_CACHE = 'public, max-age=3600'
+
+# Precompressed siblings written by compress_static(), in preference order
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticAsset:
+    """One file from the static folder, held in memory with its encoded variants"""
+
+    def __init__(self, path, content, compressed):
+        self.path = path
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type == 'application/javascript':
+            self.content_type += '; charset=utf-8'
+        self.etag = hashlib.sha1(content).hexdigest()[:20]
+        self.variants = {'identity': content, **compressed}
+        if HASHED_ASSET.match(path):
+            self.cache_control = IMMUTABLE_CACHE
+        elif path.endswith('.html'):
+            self.cache_control = REVALIDATE_CACHE
+        else:
+            self.cache_control = DEFAULT_CACHE
+
+
+def _is_compressible(path, size):
+    content_type = mimetypes.guess_type(path)[0] or ''
+    return size >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def compress_static(static_folder):
+    """Write .gz and .br siblings for every compressible file; run at build time"""
+    written = []
+    for relative, full_path in _walk(static_folder):
+        content = _read(full_path)
+        if not _is_compressible(relative, len(content)):
+            continue
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content, quality=11)))
+        for suffix, data in variants:
+            with open(full_path + suffix, 'wb') as f:
+                f.write(data)
+            written.append(relative + suffix)
+    return written
+
+
+def _walk(static_folder):
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(('.gz', '.br')):
+                continue
+            full_path = os.path.join(root, name)
+            yield os.path.relpath(full_path, static_folder).replace(os.sep, '/'), full_path
+
+
+class StaticAssets:
+    """In-memory manifest of the static folder, built once at startup.
+
+    Requests are answered from memory without touching the filesystem. Encoded
+    variants come from precompressed files when they exist; otherwise gzip is
+    produced while the manifest is built.
+    """
+
+    def __init__(self):
+        self.assets = {}
+        self.index = None
+
+    def init_app(self, app):
+        static_folder = app.static_folder
+        assets = {}
+        if static_folder and os.path.isdir(static_folder):
+            for relative, full_path in _walk(static_folder):
+                content = _read(full_path)
+                compressed = {}
+                if _is_compressible(relative, len(content)):
+                    for encoding, suffix in ENCODINGS:
+                        if os.path.exists(full_path + suffix):
+                            compressed[encoding] = _read(full_path + suffix)
+                    if 'gzip' not in compressed:
+                        compressed['gzip'] = gzip.compress(content, compresslevel=6, mtime=0)
+                assets[relative] = StaticAsset(relative, content, compressed)
+        self.assets = assets
+        self.index = assets.get('index.html')
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def respond(self, asset):
+        encoding = 'identity'
+        accepted = request.accept_encodings
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and accepted[candidate]:
+                encoding = candidate
+                break
+
+        etag = asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}'
+        headers = {
+            'Cache-Control': asset.cache_control,
+            'ETag': f'"{etag}"',
+            'Vary': 'Accept-Encoding'
+        }
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers=headers)
+
+        body = asset.variants[encoding]
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return Response(body, headers=headers, content_type=asset.content_type)
+
+
+static_assets = StaticAssets()
@@ -0,0 +1,139 @@
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.sessions import PerSession
+from src.services.submissions import submission_queue
+from collections import Counter
+import threading
+import time
+import os
+
+# Seconds a computed snapshot is trusted before it is reloaded from the database.
+# Other worker processes only become visible after a reload, so keep this short.
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '5'))
+HISTOGRAM_BUCKET_SIZE = 10
+
+
+def load_score_snapshot(session_id):
+    """Read a session's registrations, per-score counts and newest id in a single grouped query"""
+    # Rows that are not completed collapse into the NULL group, so one pass
+    # over the session's rows yields both the registration total and the score counts
+    completed_score = db.case(
+        (Participant.completed_at.isnot(None), db.func.coalesce(Participant.score, 0)),
+        else_=None
+    ).label('completed_score')
+    rows = db.session.query(
+        completed_score,
+        db.func.count(),
+        db.func.max(Participant.id)
+    ).filter(Participant.session_id == session_id).group_by(completed_score).all()
+
+    total = 0
+    newest_id = 0
+    score_counts = Counter()
+    for score, count, max_id in rows:
+        total += count
+        newest_id = max(newest_id, max_id)
+        if score is not None:
+            score_counts[score] += count
+    return total, score_counts, newest_id
+
+
+def session_activity(session_id):
+    """(participants, completed, newest id) of a session; moves with any worker's writes to it"""
+    row = db.session.query(
+        db.func.count(Participant.id),
+        db.func.count(Participant.completed_at),
+        db.func.max(Participant.id)
+    ).filter(Participant.session_id == session_id).one()
+    return tuple(row)
+
+
+class StatsCache:
+    """One session's participant statistics, kept in memory and patched on every write"""
+
+    def __init__(self, session_id, ttl=STATS_CACHE_TTL):
+        self.session_id = session_id
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._expires_at = 0.0
+        self._total = 0
+        self._score_counts = Counter()
+        self._loaded_seq = 0  # submits up to this queue sequence number are in the snapshot
+        self._loaded_id = 0  # registrations up to this participant id are in the snapshot
+
+    def get(self):
+        """Return the stats dict, reloading from the database once the TTL lapses"""
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._load()
+            return self._render()
+
+    def invalidate(self):
+        with self._lock:
+            self._expires_at = 0.0
+
+    def _load(self):
+        # The table plus the results still queued for it, read as one consistent view
+        with submission_queue.snapshot() as (queued, seq):
+            total, score_counts, newest_id = load_score_snapshot(self.session_id)
+        for record in queued:
+            if record.get('session_id') == self.session_id:
+                score_counts[record['score']] += 1
+        self._total, self._score_counts = total, score_counts
+        self._loaded_seq, self._loaded_id = seq, newest_id
+        self._expires_at = time.monotonic() + self.ttl
+
+    def record_registration(self, participant_id=None):
+        """Count a registration that has already been committed.
+
+        A registration with an id the last snapshot already covers is not
+        counted again. Ids are assigned in commit order on SQLite; on
+        PostgreSQL a registration committed out of id order can be missed
+        until the next reload, never counted twice.
+        """
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._load()
+            if participant_id is not None and participant_id <= self._loaded_id:
+                return
+            self._total += 1
+
+    def record_submission(self, score, previous_score=None, seq=None):
+        """Apply a submit; previous_score is the old score when a participant resubmits.
+
+        seq is the submit's submission-queue sequence number; a submit the
+        last snapshot already counted is not counted again.
+        """
+        with self._lock:
+            if time.monotonic() >= self._expires_at:
+                self._load()
+            if seq is not None and seq <= self._loaded_seq:
+                return
+            if previous_score is not None:
+                self._score_counts[previous_score] -= 1
+                if self._score_counts[previous_score] <= 0:
+                    del self._score_counts[previous_score]
+            self._score_counts[score] += 1
+
+    def _render(self):
+        completed = sum(self._score_counts.values())
+        score_sum = sum(score * count for score, count in self._score_counts.items())
+
+        buckets = Counter()
+        for score, count in self._score_counts.items():
+            buckets[score // HISTOGRAM_BUCKET_SIZE * HISTOGRAM_BUCKET_SIZE] += count
+
+        return {
+            'session_id': self.session_id,
+            'total_participants': self._total,
+            'completed_participants': completed,
+            'average_score': round(score_sum / completed, 2) if completed else 0,
+            'highest_score': max(self._score_counts) if completed else 0,
+            'score_histogram': [
+                {'min': low, 'max': low + HISTOGRAM_BUCKET_SIZE - 1, 'count': buckets[low]}
+                for low in sorted(buckets)
+            ]
+        }
+
+
+stats_caches = PerSession(StatsCache)
@@ -0,0 +1,341 @@
+from src.models.user import db
+from src.models.participant import Participant
+from src.models.submission_receipt import SubmissionReceipt
+from src.services.idempotency import submission_receipts
+from src.services.http_cache import data_version
+from src.services.metrics import request_metrics
+from src.services.scoring import get_question_bank
+from sqlalchemy.exc import DBAPIError, OperationalError
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+import atexit
+import queue
+import glob
+import sys
+import json
+import time
+import os
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX development machines
+    fcntl = None
+
+SUBMISSION_LOG_DIR = os.getenv(
+    'SUBMISSION_LOG_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database')
+)
+SUBMISSION_BATCH_SIZE = int(os.getenv('SUBMISSION_BATCH_SIZE', '200'))
+SUBMISSION_FLUSH_INTERVAL = int(os.getenv('SUBMISSION_FLUSH_INTERVAL_MS', '50')) / 1000
+SUBMISSION_RETRY_DELAY = 0.5
+# Results the table refuses are moved here; the name is outside the replay glob
+REJECTED_LOG_NAME = 'rejected-submissions.log'
+
+RESULT_COLUMNS = ('score', 'correct_answers', 'total_questions', 'time_taken', 'answers', 'selections',
+                  'completed_at', 'answer_key_version')
+
+
+class SubmissionLog:
+    """Append-only JSON-lines log; appends are acknowledged only after fsync.
+
+    Concurrent appenders share fsync calls: whoever syncs first covers every
+    line written before it, so the others return without syncing again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        if fcntl is not None:
+            # Held for the life of the process so startup replay skips live logs
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._write_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._write_lock:
+            self._file.write(line)
+            self._file.flush()
+            self._written += 1
+            seq = self._written
+        with self._sync_lock:
+            if self._synced < seq:
+                with self._write_lock:
+                    target = self._written
+                os.fsync(self._file.fileno())
+                self._synced = target
+
+    def truncate(self):
+        with self._write_lock:
+            self._file.truncate(0)
+
+    def close(self):
+        self._file.close()
+        os.remove(self.path)
+
+
+def read_log(path):
+    """Yield the records of a log file, skipping a torn final line"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def apply_results(records):
+    """Write a group of results to the participant table in one transaction.
+
+    Only a participant's first result is kept: one already completed, by
+    this or another worker, is left as it is. The receipts carried by the
+    results that were written are stored with them. Results graded with an
+    answer key older than the newest published one are regraded before the
+    commit, so a rescore never misses them.
+    """
+    first = {}
+    for record in records:
+        first.setdefault(record['participant_id'], record)
+
+    table = Participant.__table__
+    update = db.update(table).where(
+        table.c.id == db.bindparam('participant_id')
+    ).values(**{column: db.bindparam(f'new_{column}') for column in RESULT_COLUMNS})
+    params = [
+        {
+            'participant_id': record['participant_id'],
+            **{f'new_{column}': record.get(column) for column in RESULT_COLUMNS},
+            'new_selections': bytes.fromhex(record['selections']) if record.get('selections') else None,
+            'new_completed_at': datetime.fromisoformat(record['completed_at'])
+        }
+        for record in first.values()
+    ]
+    db.session.execute(update.where(table.c.completed_at.is_(None)), params)
+    # The rows now holding this group's timestamps are the ones it wrote
+    written = dict(db.session.execute(
+        db.select(table.c.id, table.c.completed_at).where(table.c.id.in_(list(first)))
+    ).all())
+    params = [p for p in params if written.get(p['participant_id']) == p['new_completed_at']]
+    SubmissionReceipt.record([
+        {'participant_id': p['participant_id'], **first[p['participant_id']]['receipt']}
+        for p in params if first[p['participant_id']].get('receipt')
+    ])
+
+    # Checked after the write: from here a concurrent publish waits for this
+    # commit, and the rescore that follows it reads these rows
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(db.text('LOCK TABLE answer_key IN SHARE MODE'))
+    bank = get_question_bank(refresh=True)
+    stale = [p for p in params if p['new_answer_key_version'] != bank.version]
+    if stale:
+        for p in stale:
+            p['new_score'], p['new_correct_answers'] = bank.regrade(p['new_selections'], p['new_answers'])
+            p['new_total_questions'] = len(bank)
+            p['new_answer_key_version'] = bank.version
+        db.session.execute(update, stale)
+    db.session.commit()
+
+
+def is_transient(error):
+    """Lost connections and lock timeouts clear up on retry; other errors are the record's fault"""
+    return isinstance(error, OperationalError) or (
+        isinstance(error, DBAPIError) and error.connection_invalidated
+    )
+
+
+def apply_isolating(records, reject):
+    """Apply a group of results; if the group fails, apply them one by one.
+
+    A record that fails for a reason other than a transient database error is
+    passed to reject(record, error) and skipped, so one bad record cannot hold
+    back the rest. Transient errors are raised for the caller to retry.
+    """
+    try:
+        apply_results(records)
+        return
+    except Exception as e:
+        db.session.rollback()
+        if is_transient(e):
+            raise
+    for record in records:
+        try:
+            apply_results([record])
+        except Exception as e:
+            db.session.rollback()
+            if is_transient(e):
+                raise
+            reject(record, e)
+
+
+class SubmissionQueue:
+    """Write-behind buffer between the submit endpoint and the participant table"""
+
+    def __init__(self, batch_size=SUBMISSION_BATCH_SIZE, flush_interval=SUBMISSION_FLUSH_INTERVAL,
+                 log_dir=SUBMISSION_LOG_DIR):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.log_dir = log_dir
+        self.app = None
+        self.log = None
+        self._queue = queue.Queue()  # sequence numbers, in submit order
+        self._idle = threading.Condition()
+        self._in_flight = 0
+        self._thread = None
+        self._seq = 0
+        self._unapplied = {}  # sequence number -> record accepted but not yet in the table
+        self._pending_lock = threading.Lock()
+        self._apply_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Replay orphaned logs, open this process's log and start the flusher"""
+        self.app = app
+        os.makedirs(self.log_dir, exist_ok=True)
+        with app.app_context():
+            self.replay()
+        self.log = SubmissionLog(os.path.join(self.log_dir, f'submissions-{os.getpid()}.log'))
+        self._thread = threading.Thread(target=self._run, daemon=True, name='submission-flusher')
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def replay(self):
+        """Apply every log left behind by a process that is no longer running"""
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.log_dir, 'submissions-*.log'))):
+            with open(path, 'a') as handle:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # owned by a live worker
+                records = list(read_log(path))
+                for start in range(0, len(records), self.batch_size):
+                    apply_isolating(records[start:start + self.batch_size], self.reject)
+                replayed += len(records)
+                os.remove(path)
+        return replayed
+
+    def submit(self, participant_id, score, correct_answers, total_questions, time_taken,
+               answers, selections, completed_at, session_id=None, answer_key_version=None, receipt=None):
+        """Durably record a result; it reaches the database on the next flush.
+
+        answers is the already-encoded JSON text stored in Participant.answers
+        and selections the packed bytes stored in Participant.selections.
+        answer_key_version is the version of the bank that graded it and
+        receipt the {'key', 'response'} of the submit, stored with the result.
+        Returns the result's sequence number in this process (see snapshot).
+        """
+        record = {
+            'participant_id': participant_id,
+            'session_id': session_id,
+            'score': score,
+            'correct_answers': correct_answers,
+            'total_questions': total_questions,
+            'time_taken': time_taken,
+            'answers': answers,
+            'selections': selections.hex(),
+            'completed_at': completed_at.isoformat(),
+            'answer_key_version': answer_key_version,
+            'receipt': receipt
+        }
+        with self._idle:
+            self._in_flight += 1
+        try:
+            self.log.append(record)
+        except Exception:
+            with self._idle:
+                self._in_flight -= 1
+                self._idle.notify_all()
+            raise
+        with self._pending_lock:
+            self._seq += 1
+            seq = self._seq
+            self._unapplied[seq] = record
+            self._queue.put(seq)
+        return seq
+
+    @contextmanager
+    def snapshot(self):
+        """Hold off the flusher while the caller reads the participant table.
+
+        Yields (records not yet in the table, last sequence number). Together
+        with what the caller reads inside the block they cover every result
+        up to that number exactly once.
+        """
+        with self._apply_lock:
+            with self._pending_lock:
+                queued = list(self._unapplied.values())
+                seq = self._seq
+            yield queued, seq
+
+    def reject(self, record, error):
+        """Set aside a result the table will not accept, with the reason"""
+        line = json.dumps({'record': record, 'error': repr(error)}, ensure_ascii=False, default=repr)
+        with open(os.path.join(self.log_dir, REJECTED_LOG_NAME), 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        print(f'[submissions] rejected result for participant {record.get("participant_id")}: {error!r}',
+              file=sys.stderr, flush=True)
+
+    def wait_idle(self, timeout=None):
+        """Block until every accepted result has been written to the database"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def shutdown(self):
+        if self.log is not None and self.wait_idle(timeout=5):
+            self.log.close()
+            self.log = None
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            with self._pending_lock:
+                records = [self._unapplied[seq] for seq in batch]
+            while True:
+                try:
+                    with self._apply_lock:
+                        with self.app.app_context():
+                            apply_isolating(records, self.reject)
+                        with self._pending_lock:
+                            for seq in batch:
+                                del self._unapplied[seq]
+                    submission_receipts.flushed(
+                        [record['participant_id'] for record in records if record.get('receipt')]
+                    )
+                    # Listings read from the table only see these results now
+                    data_version.bump()
+                    break
+                except Exception:
+                    # Transient: the results are safe in the log; retry the same group
+                    self.app.logger.exception('Flushing %d submitted results failed', len(records))
+                    request_metrics.record_background_error('submission-flusher')
+                    with self.app.app_context():
+                        db.session.rollback()
+                    time.sleep(SUBMISSION_RETRY_DELAY)
+
+            with self._idle:
+                self._in_flight -= len(batch)
+                if self._in_flight == 0:
+                    # Everything logged so far is in the database
+                    self.log.truncate()
+                    self._idle.notify_all()
+
+
+submission_queue = SubmissionQueue()
@@ -0,0 +1,90 @@
+"""Compiled, cached templates for server-rendered pages and emails.
+
+Templates live in src/templates and are compiled once per process; nothing
+is reparsed per request. A page whose output never changes is rendered once
+and kept as an in-memory asset with its ETag and gzip variant, served like
+the static frontend. An email template is rendered once around its
+per-recipient fields, so each message only joins the pre-rendered pieces
+with that recipient's escaped values.
+
+Entries are keyed by the static context they were rendered with, so a new
+value such as the question count produces a fresh entry.
+"""
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+from src.services.static_assets import StaticAsset
+import threading
+import gzip
+import re
+import os
+
+TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates')
+
+# Stands in for a per-recipient field while the template is pre-rendered
+SLOT_MARKER = re.compile('\x00([a-z_]+)\x00')
+
+
+class SlotTemplate:
+    """A template pre-rendered around named fields that are filled in per message.
+
+    Fields must be output as plain {{ field }}: filters and conditionals
+    would act on the placeholder rather than the real value.
+    """
+
+    def __init__(self, template, fields, context):
+        placeholders = {name: Markup(f'\x00{name}\x00') for name in fields}
+        # Alternates static text and field names: [text, field, text, field, ..., text]
+        self._parts = SLOT_MARKER.split(template.render(**context, **placeholders))
+
+    def render(self, **values):
+        parts = list(self._parts)
+        for i in range(1, len(parts), 2):
+            parts[i] = escape(values.get(parts[i], ''))
+        return ''.join(parts)
+
+
+class TemplateCache:
+    def __init__(self, folder=TEMPLATE_FOLDER):
+        self.env = Environment(
+            loader=FileSystemLoader(folder),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False
+        )
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def page(self, name, **context):
+        """The template rendered once as a StaticAsset with its ETag and gzip variant"""
+        return self._cached(('page', name, _freeze(context)), lambda: self._render_page(name, context))
+
+    def slots(self, name, fields, **context):
+        """The template compiled once into a SlotTemplate over the given fields"""
+        return self._cached(
+            ('slots', name, tuple(fields), _freeze(context)),
+            lambda: SlotTemplate(self.env.get_template(name), fields, context)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self.env.cache.clear()
+
+    def _cached(self, key, build):
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = build()
+        return entry
+
+    def _render_page(self, name, context):
+        content = self.env.get_template(name).render(**context).encode('utf-8')
+        return StaticAsset(name, content, {'gzip': gzip.compress(content, compresslevel=6, mtime=0)})
+
+
+def _freeze(context):
+    return tuple(sorted(context.items()))
+
+
+template_cache = TemplateCache()
@@ -0,0 +1,129 @@
+"""Startup phase timings and the lazy WSGI entry point used for fast cold starts.
+
+The free Render instance spins down when idle, so the first request after a
+wake-up waits for the whole boot. With STARTUP_MODE=lazy the worker serves
+LazyApp, which needs nothing beyond the standard library: /health is answered
+at once, while a background thread imports the app, checks the schema, opens
+a database connection and warms the caches. Other requests wait for that
+thread (up to STARTUP_WAIT_TIMEOUT seconds) and are then handed to the real
+app. STARTUP_MODE=eager, the default, loads everything before serving.
+
+Workers on the same host load one at a time, holding STARTUP_LOCK_PATH. On a
+fractional CPU two loads at once would both take twice as long; in turn, the
+first worker is ready after one load, and the schema check never races.
+
+Each phase is timed; the breakdown is printed once loading ends and served
+at /health/startup.
+"""
+from contextlib import contextmanager
+import threading
+import tempfile
+import json
+import time
+import sys
+import os
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX development machines
+    fcntl = None
+
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'eager')
+STARTUP_WAIT_TIMEOUT = float(os.getenv('STARTUP_WAIT_TIMEOUT', '60'))
+STARTUP_RETRY_AFTER = 5  # seconds
+STARTUP_LOCK_PATH = os.getenv('STARTUP_LOCK_PATH', os.path.join(tempfile.gettempdir(), 'hindi-quiz-startup.lock'))
+
+SERVICE_NAME = 'hindi-quiz-backend'
+
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.ready_after = None
+        self.error = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def finish(self, error=None):
+        self.ready_after = time.perf_counter() - self.started
+        self.error = error
+        phases = ', '.join(f'{name}={seconds * 1000:.0f}ms' for name, seconds in self.phases)
+        status = f'failed: {error}' if error else f'ready in {self.ready_after * 1000:.0f}ms'
+        print(f'[startup] pid {os.getpid()} {STARTUP_MODE} {status} ({phases})', file=sys.stderr, flush=True)
+
+    def report(self):
+        return {
+            'mode': STARTUP_MODE,
+            'ready': self.ready_after is not None and self.error is None,
+            'ready_after_ms': round(self.ready_after * 1000, 1) if self.ready_after is not None else None,
+            'uptime_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'phases': [{'name': name, 'ms': round(seconds * 1000, 1)} for name, seconds in self.phases],
+            'error': self.error
+        }
+
+
+startup_timer = StartupTimer()
+
+
+def _json_response(start_response, status, payload, headers=()):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    start_response(status, [
+        ('Content-Type', 'application/json'),
+        ('Content-Length', str(len(body))),
+        *headers
+    ])
+    return [body]
+
+
+class LazyApp:
+    """WSGI app that answers /health immediately and loads the real app in a background thread"""
+
+    def __init__(self, load):
+        self._load = load
+        self._app = None
+        self._ready = threading.Event()
+        threading.Thread(target=self._run, daemon=True, name='app-loader').start()
+
+    def _run(self):
+        try:
+            with open(STARTUP_LOCK_PATH, 'a') as lock:
+                if fcntl is not None:
+                    with startup_timer.phase('wait_for_other_workers'):
+                        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                self._app = self._load()
+            startup_timer.finish()
+        except Exception as e:
+            startup_timer.finish(repr(e))
+        finally:
+            self._ready.set()
+
+    def __call__(self, environ, start_response):
+        app = self._app
+        if app is not None:
+            return app(environ, start_response)
+
+        path = environ.get('PATH_INFO', '')
+        if path == '/health':
+            if self._ready.is_set():
+                # Loading failed; let the platform restart the instance
+                return _json_response(start_response, '503 Service Unavailable',
+                                      {'status': 'unhealthy', 'service': SERVICE_NAME})
+            return _json_response(start_response, '200 OK', {'status': 'starting', 'service': SERVICE_NAME})
+        if path == '/health/startup':
+            return _json_response(start_response, '200 OK', startup_timer.report())
+
+        self._ready.wait(STARTUP_WAIT_TIMEOUT)
+        if self._app is None:
+            return _json_response(
+                start_response, '503 Service Unavailable',
+                {'success': False, 'error': 'सर्वर शुरू हो रहा है, कृपया कुछ देर बाद पुनः प्रयास करें'},
+                [('Retry-After', str(STARTUP_RETRY_AFTER))]
+            )
+        return self._app(environ, start_response)
@@ -0,0 +1,24 @@
+"""WSGI entry point for production servers: gunicorn src.wsgi:app"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.startup import startup_timer, LazyApp, STARTUP_MODE
+
+
+def load_app():
+    with startup_timer.phase('import'):
+        from src.main import create_app, start_services
+    with startup_timer.phase('create_app'):
+        app = create_app()
+    # In eager mode the schema is created once by the gunicorn master (see
+    # gunicorn.conf.py); in lazy mode each worker checks it in the background
+    start_services(app, init_schema=STARTUP_MODE == 'lazy')
+    return app
+
+
+if STARTUP_MODE == 'lazy':
+    app = LazyApp(load_app)
+else:
+    app = load_app()
+    startup_timer.finish()
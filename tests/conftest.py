@@ -0,0 +1,68 @@
+import itertools
+import tempfile
+import os
+import sys
+
+import pytest
+
+# Settings are read when the app modules are imported, so the scratch
+# database and submission log directory are set up first
+_workdir = tempfile.mkdtemp(prefix='hindi-quiz-tests-')
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(_workdir, "test.db")}'
+os.environ['SUBMISSION_LOG_DIR'] = os.path.join(_workdir, 'submissions')
+os.environ['RATE_LIMIT_ENABLED'] = 'false'
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app, init_db, start_services
+from src.models.user import db
+from src.models.quiz import Quiz
+from src.services.sessions import create_session
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    init_db(app)
+    start_services(app)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def session_id(app):
+    """A new open session, so a test only sees its own participants"""
+    with app.app_context():
+        quiz_id = db.session.query(db.func.min(Quiz.id)).scalar()
+        return create_session(quiz_id, f'test session {next(_emails)}').id
+
+
+@pytest.fixture
+def register(client, session_id):
+    """Register a participant in the test's session and return it as served by the API"""
+    def register(**fields):
+        data = {
+            'name': 'परीक्षार्थी',
+            'department': 'राजभाषा',
+            'post': 'सहायक',
+            'email': f'participant{next(_emails)}@example.com',
+            'mobile': '9999999999',
+            'session_id': session_id,
+            **fields
+        }
+        response = client.post('/api/quiz/participants', json=data)
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()['participant']
+    return register
+
+
+@pytest.fixture
+def participant(register):
+    return register()
@@ -0,0 +1,59 @@
+import csv
+import io
+import zipfile
+
+from src.services.export import EXPORT_FIELDS
+from src.services.submissions import submission_queue
+
+
+def _export(client, session_id, export_format):
+    return client.get(f'/admin/export?session_id={session_id}&format={export_format}')
+
+
+def test_csv_export_streams_the_session(client, session_id, register):
+    participants = [register() for _ in range(3)]
+    client.post(f'/api/quiz/participants/{participants[0]["id"]}/submit',
+                json={'answers': [{'questionId': 1, 'selectedAnswer': 2}], 'time_taken': 9})
+    assert submission_queue.wait_idle(timeout=5)
+
+    response = _export(client, session_id, 'csv')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'].startswith('attachment; filename="participants-')
+    body = response.get_data().decode('utf-8')
+    assert body.startswith('\ufeff')
+    rows = list(csv.reader(io.StringIO(body[1:])))
+    header, rows = rows[0], rows[1:]
+    assert header[:len(EXPORT_FIELDS)] == list(EXPORT_FIELDS)
+    assert [int(row[0]) for row in rows] == [p['id'] for p in participants]
+    # Selections are shown 1-based, blank when unanswered
+    first = dict(zip(header, rows[0]))
+    assert (first['Q1'], first['Q2']) == ('3', '')
+
+
+def test_formula_text_is_quoted_in_both_formats(client, session_id, register):
+    register(name='=HYPERLINK("http://evil.example","x")', department='+91', post='@SUM(A1)', mobile='-5')
+
+    rows = list(csv.reader(io.StringIO(_export(client, session_id, 'csv').get_data().decode('utf-8')[1:])))
+    row = dict(zip(rows[0], rows[1]))
+    assert row['name'] == '\'=HYPERLINK("http://evil.example","x")'
+    assert (row['department'], row['post'], row['mobile']) == ("'+91", "'@SUM(A1)", "'-5")
+
+    archive = zipfile.ZipFile(io.BytesIO(_export(client, session_id, 'xlsx').get_data()))
+    sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+    assert '<t>\'=HYPERLINK("http://evil.example","x")</t>' in sheet
+    assert "<t>'+91</t>" in sheet and "<t>'@SUM(A1)</t>" in sheet
+
+
+def test_xlsx_export_is_a_workbook(client, session_id, register):
+    register()
+    response = _export(client, session_id, 'xlsx')
+    assert response.mimetype == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    assert archive.testzip() is None
+    sheet = archive.read('xl/worksheets/sheet1.xml').decode('utf-8')
+    assert sheet.count('<row>') == 2
+
+
+def test_unknown_export_format(client, session_id):
+    assert _export(client, session_id, 'pdf').status_code == 400
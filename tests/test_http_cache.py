@@ -0,0 +1,39 @@
+import gzip
+
+from src.services import http_cache
+from src.services.http_cache import data_version, GZIP_MIN_SIZE
+
+
+def _stats(client, session_id, **headers):
+    return client.get(f'/api/quiz/participants/stats?session_id={session_id}', headers=headers)
+
+
+def test_unchanged_poll_gets_304_until_a_write(client, session_id, register):
+    etag = _stats(client, session_id).headers['ETag']
+    assert _stats(client, session_id, **{'If-None-Match': etag}).status_code == 304
+
+    register()
+    response = _stats(client, session_id, **{'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_each_worker_process_mints_its_own_tag(client, session_id, monkeypatch):
+    etag = _stats(client, session_id).headers['ETag']
+    # A worker forked from the master after the app was imported
+    pid = http_cache.os.getpid() + 1
+    monkeypatch.setattr(http_cache.os, 'getpid', lambda: pid)
+
+    response = _stats(client, session_id, **{'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert _stats(client, session_id, **{'If-None-Match': response.headers['ETag']}).status_code == 304
+
+
+def test_large_listing_is_served_gzipped(client, session_id, register):
+    for _ in range(20):
+        register()
+    data_version.bump(session_id)
+    response = client.get(f'/api/quiz/participants?session_id={session_id}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(gzip.decompress(response.get_data())) >= GZIP_MIN_SIZE
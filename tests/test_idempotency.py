@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from src.models.user import db
+from src.models.participant import Participant
+from src.models.submission_receipt import SubmissionReceipt
+from src.services.idempotency import submission_receipts
+from src.services.scoring import get_question_bank
+from src.services.submissions import submission_queue, apply_results
+
+
+def _all_correct():
+    return [{'questionId': q['id'], 'selectedAnswer': q['correct']} for q in get_question_bank().questions]
+
+
+def _submit(client, participant, headers=None, **data):
+    return client.post(f'/api/quiz/participants/{participant["id"]}/submit', json=data, headers=headers)
+
+
+def test_retried_submit_replays_the_first_response(client, participant):
+    first = _submit(client, participant, answers=_all_correct(), time_taken=30)
+    retry = _submit(client, participant, answers=_all_correct(), time_taken=30)
+    assert retry.status_code == 200
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_data() == first.get_data()
+
+
+def test_idempotency_key_identifies_a_retry(client, participant):
+    headers = {'Idempotency-Key': 'attempt-1'}
+    first = _submit(client, participant, headers, answers=_all_correct(), time_taken=30)
+    # The key, not the payload, marks the retry
+    retry = _submit(client, participant, headers, answers=[], time_taken=31)
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_data() == first.get_data()
+
+
+def test_a_different_second_submit_is_rejected(client, participant):
+    assert _submit(client, participant, answers=_all_correct(), time_taken=30).status_code == 200
+    assert _submit(client, participant, answers=[], time_taken=5).status_code == 409
+
+
+def test_receipt_is_stored_with_the_flushed_result(app, client, participant):
+    first = _submit(client, participant, answers=_all_correct(), time_taken=30)
+    assert submission_queue.wait_idle(timeout=5)
+    with app.app_context():
+        receipt = db.session.get(SubmissionReceipt, participant['id'])
+        assert receipt.response == first.get_data(as_text=True)
+
+    # Answered from the table once this process has forgotten it
+    submission_receipts.clear()
+    retry = _submit(client, participant, answers=_all_correct(), time_taken=30)
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_data() == first.get_data()
+
+
+def test_first_result_flushed_by_any_worker_wins(app, participant):
+    def result(score, key):
+        return {
+            'participant_id': participant['id'],
+            'score': score,
+            'correct_answers': 0,
+            'total_questions': 25,
+            'time_taken': 10,
+            'answers': '[]',
+            'selections': '',
+            'completed_at': datetime.utcnow().isoformat(),
+            'answer_key_version': get_question_bank().version,
+            'receipt': {'key': key, 'response': f'{{"score": {score}}}'}
+        }
+
+    with app.app_context():
+        # Two workers each accepted a submit; their flushers commit one after the other
+        apply_results([result(40, 'first')])
+        apply_results([result(10, 'second')])
+        assert db.session.get(Participant, participant['id']).score == 40
+        assert db.session.get(SubmissionReceipt, participant['id']).key == 'first'
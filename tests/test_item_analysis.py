@@ -0,0 +1,49 @@
+from datetime import datetime
+import json
+
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.scoring import get_question_bank, UNANSWERED
+
+
+def _store(app, participant, selections, answers):
+    with app.app_context():
+        db.session.execute(db.update(Participant.__table__).where(Participant.id == participant['id']).values(
+            selections=selections, answers=answers, completed_at=datetime.utcnow()
+        ))
+        db.session.commit()
+
+
+def _answers(*pairs):
+    return json.dumps([{'questionId': q, 'selectedAnswer': a} for q, a in pairs])
+
+
+def test_item_analysis_reads_packed_legacy_and_mismatched_rows(app, client, session_id, register):
+    bank = get_question_bank()
+    first_option_row = [0] + [UNANSWERED] * (len(bank) - 1)
+    packed, legacy, resized, unreadable = (register() for _ in range(4))
+    _store(app, packed, bank.pack(first_option_row), None)
+    # Written before the packed column existed
+    _store(app, legacy, None, _answers((1, 0)))
+    # Packed for a bank of another length; its answers still say which options were picked
+    _store(app, resized, b'\x00\x01', _answers((1, 0), (2, 1)))
+    _store(app, unreadable, b'\x00\x01', None)
+
+    response = client.get(f'/admin/item-analysis?session_id={session_id}')
+    assert response.status_code == 200
+    analysis = response.get_json()
+    assert (analysis['participants'], analysis['skipped']) == (3, 1)
+
+    first, second = analysis['items'][:2]
+    assert first['options'][0]['count'] == 3
+    assert first['unanswered'] == 0
+    assert second['options'][1]['count'] == 1
+    assert second['unanswered'] == 2
+    assert first['difficulty'] == (1.0 if bank.questions[0]['correct'] == 0 else 0.0)
+
+
+def test_item_analysis_of_a_session_without_submissions(client, session_id, register):
+    register()
+    analysis = client.get(f'/admin/item-analysis?session_id={session_id}').get_json()
+    assert (analysis['participants'], analysis['skipped']) == (0, 0)
+    assert analysis['items'][0]['discrimination'] is None
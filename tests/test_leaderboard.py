@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from src.services.leaderboard import leaderboards
+from src.services.scoring import get_question_bank
+from src.services.submissions import apply_results
+
+
+def _rank(client, participant):
+    return client.get(f'/api/quiz/leaderboard/rank/{participant["id"]}')
+
+
+def _complete_elsewhere(app, participant, score):
+    """Write a result straight to the table, as another worker's flusher would"""
+    with app.app_context():
+        apply_results([{
+            'participant_id': participant['id'],
+            'score': score,
+            'correct_answers': 0,
+            'total_questions': 25,
+            'time_taken': 10,
+            'answers': '[]',
+            'selections': '',
+            'completed_at': datetime.utcnow().isoformat(),
+            'answer_key_version': get_question_bank().version
+        }])
+
+
+def test_rank_is_found_for_a_result_written_by_another_worker(app, client, session_id, register):
+    first, second = register(), register()
+    client.post(f'/api/quiz/participants/{first["id"]}/submit', json={'answers': [], 'time_taken': 5})
+    _complete_elsewhere(app, second, 50)
+
+    response = _rank(client, second)
+    assert response.status_code == 200
+    assert response.get_json()['rank'] == 1
+    assert response.get_json()['total_ranked'] == 2
+
+
+def test_top_picks_up_results_written_by_another_worker(app, client, session_id, register, monkeypatch):
+    first, second = register(), register()
+    client.post(f'/api/quiz/participants/{first["id"]}/submit', json={'answers': [], 'time_taken': 5})
+    board = leaderboards.get(session_id)
+    with app.app_context():
+        assert [e['id'] for e in board.top(10)] == [first['id']]
+
+    _complete_elsewhere(app, second, 50)
+    monkeypatch.setattr(board, 'check_interval', 0)
+    with app.app_context():
+        assert [e['id'] for e in board.top(10)] == [second['id'], first['id']]
+
+
+def test_rank_holds_across_a_refresh(app, client, session_id, register):
+    participant = register()
+    client.post(f'/api/quiz/participants/{participant["id"]}/submit', json={'answers': [], 'time_taken': 5})
+    before = _rank(client, participant).get_json()
+
+    # Rebuilt from the table plus whatever is still queued for it
+    with app.app_context():
+        leaderboards.get(session_id).rebuild()
+    assert _rank(client, participant).get_json() == before
+
+
+def test_rank_of_a_participant_who_has_not_finished(client, participant):
+    assert _rank(client, participant).status_code == 404
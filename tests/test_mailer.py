@@ -0,0 +1,130 @@
+import email
+import socketserver
+import threading
+import time
+
+import pytest
+
+from src.services.mailer import EmailDispatcher, email_dispatcher
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough of an SMTP server to accept mail; refuses recipients starting with "refused" """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 stand-in ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode('ascii').strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 stand-in')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip('<> ')
+                if address.startswith('refused'):
+                    self.reply('550 no such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 ok')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                data = b''
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk == b'.\r\n':
+                        break
+                    data += chunk
+                self.server.messages.append((recipients, email.message_from_bytes(data)))
+                recipients = []
+                self.reply('250 queued')
+            else:  # MAIL, RSET, NOOP
+                self.reply('250 ok')
+
+
+def _body(message):
+    return message.get_payload()[0].get_payload(decode=True).decode('utf-8')
+
+
+@pytest.fixture
+def smtp():
+    server = SMTPStandIn()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_done(job, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert job.done
+
+
+def test_bulk_send_over_pooled_connections(smtp):
+    dispatcher = EmailDispatcher(host='127.0.0.1', port=smtp.port, sender='quiz@example.com',
+                                 password='secret', use_tls=False, pool_size=2, rate_limit=1000)
+    recipients = [f'user{i}@example.com' for i in range(10)] + ['refused@example.com']
+    reports = []
+    job = dispatcher.submit('विषय', lambda address: f'<p>नमस्ते {address}</p>', recipients, reports.append)
+    _wait_done(job)
+
+    assert job.sent_count == 10
+    assert [f['email'] for f in job.failed_emails] == ['refused@example.com']
+    assert reports[0]['status'] == 'queued'
+    assert reports[-1]['status'] == 'completed'
+    assert reports[-1]['sent_count'] == 10
+    # Each worker keeps one connection open for the whole job
+    assert smtp.connections <= 2
+    bodies = {recipients[0]: _body(message) for recipients, message in smtp.messages}
+    assert bodies['user3@example.com'] == '<p>नमस्ते user3@example.com</p>'
+
+
+def test_invitation_job_progress_is_served_from_the_table(app, client, smtp, monkeypatch):
+    for name, value in (('host', '127.0.0.1'), ('port', smtp.port), ('sender', 'quiz@example.com'),
+                        ('password', 'secret'), ('use_tls', False)):
+        monkeypatch.setattr(email_dispatcher, name, value)
+    response = client.post('/api/quiz/send-quiz-email', json={
+        'quiz_url': 'https://quiz.example.com',
+        'emails': [{'email': 'asha@example.com', 'name': 'आशा'}, 'refused@example.com']
+    })
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    deadline = time.monotonic() + 10
+    while True:
+        state = client.get(f'/api/quiz/send-quiz-email/{job_id}').get_json()
+        if state['status'] == 'completed' or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert (state['status'], state['sent_count'], state['failed_count']) == ('completed', 1, 1)
+    body = _body(smtp.messages[0][1])
+    assert 'आशा' in body
+    assert 'https://quiz.example.com?email=asha%40example.com' in body
+
+
+def test_sending_without_credentials_is_refused(client, monkeypatch):
+    monkeypatch.setattr(email_dispatcher, 'password', '')
+    response = client.post('/api/quiz/send-quiz-email', json={'emails': ['asha@example.com']})
+    assert response.status_code == 503
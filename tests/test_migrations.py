@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+
+from src import migrations
+from src.models.user import db
+from src.models.participant import Participant
+
+# The participant table as it was before any migration
+LEGACY_PARTICIPANT = '''
+CREATE TABLE participant (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    department VARCHAR(100) NOT NULL,
+    post VARCHAR(100) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    mobile VARCHAR(15) NOT NULL,
+    score INTEGER,
+    total_questions INTEGER,
+    correct_answers INTEGER,
+    time_taken INTEGER,
+    answers TEXT,
+    created_at DATETIME,
+    completed_at DATETIME
+)
+'''
+
+
+@pytest.fixture
+def legacy_engine(app, tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "legacy.db"}')
+    db.metadata.create_all(engine, tables=[t for t in db.metadata.sorted_tables if t.name != 'participant'])
+    with engine.begin() as connection:
+        connection.exec_driver_sql(LEGACY_PARTICIPANT)
+    yield engine
+    engine.dispose()
+
+
+def _insert(connection, email, **values):
+    connection.execute(db.insert(Participant.__table__).values(
+        name='क', department='द', post='प', email=email, mobile='1', created_at=datetime.utcnow(), **values
+    ))
+
+
+def _index_names(engine):
+    # Expression indexes are not reflected, so read them from the catalog
+    with engine.connect() as connection:
+        return set(connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'participant'"
+        ).scalars())
+
+
+def test_upgrade_scopes_unique_emails_to_a_session(app, legacy_engine):
+    with legacy_engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO participant (name, department, post, email, mobile) VALUES ('क', 'द', 'प', 'a@example.com', '1')"
+        )
+    with app.app_context():
+        assert migrations.upgrade(legacy_engine) == [1, 2, 3, 4]
+        assert migrations.upgrade(legacy_engine) == []
+    assert 'ux_participant_session_email' in _index_names(legacy_engine)
+
+    with legacy_engine.begin() as connection:
+        default_session = connection.execute(db.select(Participant.__table__.c.session_id)).scalar()
+        assert default_session is not None
+        other_session = default_session + 1
+        connection.exec_driver_sql(
+            f"INSERT INTO quiz_session (id, quiz_id, name, status) VALUES ({other_session}, 1, 'दूसरा', 'open')"
+        )
+        # The same address may register again in another session
+        _insert(connection, 'A@example.com', session_id=other_session)
+    with pytest.raises(IntegrityError):
+        with legacy_engine.begin() as connection:
+            _insert(connection, 'A@EXAMPLE.COM', session_id=default_session)
+
+
+def test_upgrade_refuses_duplicate_emails_in_a_session(app, legacy_engine):
+    with legacy_engine.begin() as connection:
+        for email in ('dup@example.com', 'Dup@Example.com'):
+            connection.exec_driver_sql(
+                f"INSERT INTO participant (name, department, post, email, mobile) VALUES ('क', 'द', 'प', '{email}', '1')"
+            )
+    with app.app_context(), pytest.raises(RuntimeError, match='dup@example.com'):
+        migrations.upgrade(legacy_engine)
+    assert 'ux_participant_session_email' not in _index_names(legacy_engine)
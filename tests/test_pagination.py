@@ -0,0 +1,40 @@
+def _page(client, session_id, **params):
+    query = '&'.join(f'{key}={value}' for key, value in {'session_id': session_id, **params}.items())
+    response = client.get(f'/api/quiz/participants?{query}')
+    return response.status_code, response.get_json()
+
+
+def test_pages_cover_every_participant_once_newest_first(client, session_id, register):
+    ids = [register()['id'] for _ in range(7)]
+
+    seen = []
+    params = {'limit': 3}
+    while True:
+        status, body = _page(client, session_id, **params)
+        assert status == 200
+        seen += [p['id'] for p in body['participants']]
+        if not body['has_more']:
+            assert body['next_cursor'] is None
+            break
+        params['cursor'] = body['next_cursor']
+    assert seen == ids[::-1]
+
+
+def test_a_new_registration_does_not_shift_later_pages(client, session_id, register):
+    ids = [register()['id'] for _ in range(4)]
+    _, first = _page(client, session_id, limit=2)
+    register()
+    _, second = _page(client, session_id, limit=2, cursor=first['next_cursor'])
+    assert [p['id'] for p in second['participants']] == ids[1::-1]
+
+
+def test_fields_select_the_returned_columns(client, session_id, register):
+    register()
+    status, body = _page(client, session_id, fields='id,email')
+    assert status == 200
+    assert set(body['participants'][0]) == {'id', 'email'}
+
+
+def test_unknown_field_and_bad_cursor_are_rejected(client, session_id):
+    assert _page(client, session_id, fields='id,password')[0] == 400
+    assert _page(client, session_id, cursor='not-a-cursor')[0] == 400
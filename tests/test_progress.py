@@ -0,0 +1,57 @@
+import logging
+import time
+
+from src.models.user import db
+from src.models.progress import AnswerProgress
+from src.services.metrics import request_metrics
+from src.services.progress import ProgressBuffer
+from src.services.scoring import get_question_bank, CORRECT_POINTS
+
+
+def _progress(client, participant, **data):
+    return client.post(f'/api/quiz/participants/{participant["id"]}/progress', json=data)
+
+
+def test_submit_grades_checkpointed_answers_with_the_posted_ones(client, participant):
+    first, second = get_question_bank().questions[:2]
+    assert _progress(client, participant, questionId=first['id'], selectedAnswer=first['correct'],
+                     time_taken=20).status_code == 202
+    resumed = client.get(f'/api/quiz/participants/{participant["id"]}/progress').get_json()
+    assert resumed['answered'] == 1
+
+    # The checkpointed question is not uploaded again, and time_taken comes from the checkpoint
+    response = client.post(f'/api/quiz/participants/{participant["id"]}/submit',
+                           json={'answers': [{'questionId': second['id'], 'selectedAnswer': second['correct']}]})
+    result = response.get_json()['participant']
+    assert (result['correct_answers'], result['score'], result['time_taken']) == (2, 2 * CORRECT_POINTS, 20)
+    # Progress ends with the submit
+    assert _progress(client, participant, questionId=first['id'], selectedAnswer=0).status_code == 409
+
+
+def test_failed_progress_flush_is_logged_counted_and_retried(app, participant, monkeypatch, caplog):
+    buffer = ProgressBuffer(flush_interval=0.01)
+    failures = []
+
+    def write(rows, finished):
+        if not failures:
+            failures.append(rows)
+            raise RuntimeError('database unavailable')
+        ProgressBuffer._write(rows, finished)
+
+    monkeypatch.setattr(buffer, '_write', write)
+    question = get_question_bank().questions[0]
+    buffer.record(participant['id'], 7, [(question['id'], 1)])
+    with caplog.at_level(logging.ERROR):
+        buffer.init_app(app)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            with app.app_context():
+                saved = AnswerProgress.for_participant(participant['id'])
+                db.session.rollback()
+            if saved:
+                break
+            time.sleep(0.02)
+
+    assert saved == {question['id']: (1, 7)}
+    assert 'Flushing answer progress failed' in caplog.text
+    assert 'quiz_background_errors_total{task="progress-flusher"}' in request_metrics.render()
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from src.services import rate_limit
+from src.services.rate_limit import (
+    MemoryBackend, SqliteBackend, AdmissionController, parse_limit, rate_limiter
+)
+
+
+def test_parse_limit():
+    assert parse_limit('120/60') == (120.0, 2.0)
+
+
+@pytest.mark.parametrize('backend', ['memory', 'sqlite'])
+def test_bucket_empties_and_refills(backend, tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: clock[0])
+    monkeypatch.setattr(rate_limit.time, 'time', lambda: clock[0])
+    bucket = MemoryBackend() if backend == 'memory' else SqliteBackend(str(tmp_path / 'ratelimit.db'))
+    capacity, rate = parse_limit('2/10')
+
+    assert [bucket.take('k', capacity, rate) for _ in range(2)] == [0, 0]
+    assert bucket.take('k', capacity, rate) == pytest.approx(5.0)
+    # Other keys have their own bucket
+    assert bucket.take('other', capacity, rate) == 0
+    clock[0] += 5
+    assert bucket.take('k', capacity, rate) == 0
+
+
+def test_sqlite_buckets_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'ratelimit.db')
+    # Each worker process opens the file with its own backend
+    first, second = SqliteBackend(path), SqliteBackend(path)
+    capacity, rate = parse_limit('1/60')
+    assert first.take('k', capacity, rate) == 0
+    assert second.take('k', capacity, rate) > 0
+
+
+def test_repeated_registration_of_one_email_is_throttled(client, session_id, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'enabled', True)
+    monkeypatch.setattr(rate_limiter, 'backend', MemoryBackend())
+    data = {'name': 'क', 'department': 'द', 'post': 'प', 'email': 'retry@example.com', 'mobile': '1',
+            'session_id': session_id}
+    statuses = [client.post('/api/quiz/participants', json=data).status_code for _ in range(6)]
+    # REGISTER_EMAIL_LIMIT allows 5 a minute; the first registers, the rest are duplicates
+    assert statuses == [200, 400, 400, 400, 400, 429]
+    response = client.post('/api/quiz/participants', json=data)
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_submit_has_no_per_ip_limit_by_default(client, register, monkeypatch):
+    monkeypatch.setattr(rate_limiter, 'enabled', True)
+    monkeypatch.setattr(rate_limiter, 'backend', MemoryBackend())
+    # A whole office behind one address submits at once
+    for participant in [register() for _ in range(8)]:
+        response = client.post(f'/api/quiz/participants/{participant["id"]}/submit',
+                               json={'answers': [], 'time_taken': 1})
+        assert response.status_code == 200
+
+
+def test_admission_turns_away_requests_beyond_the_cap(app):
+    admission = AdmissionController(max_in_flight=1, wait_ms=0)
+    entered, release = threading.Event(), threading.Event()
+
+    @admission
+    def view():
+        entered.set()
+        release.wait(5)
+        return 'ok'
+
+    def first_request():
+        with app.test_request_context():
+            view()
+
+    holder = threading.Thread(target=first_request)
+    holder.start()
+    entered.wait(5)
+    with app.test_request_context():
+        response, status, headers = view()
+    release.set()
+    holder.join()
+    assert status == 503
+    assert headers['Retry-After'] == str(rate_limit.ADMISSION_RETRY_AFTER)
+    with app.test_request_context():
+        assert view() == 'ok'
@@ -0,0 +1,88 @@
+import io
+import json
+
+import pytest
+
+from src.services import roster_import
+from src.services.roster_import import iter_json_records, ImportFormatError
+
+HEADER = 'name,department,post,email,mobile\n'
+
+
+def _import(client, session_id, body, content_type='text/csv', **params):
+    query = '&'.join(f'{key}={value}' for key, value in {'session_id': session_id, **params}.items())
+    return client.post(f'/admin/participants/import?{query}', data=body, content_type=content_type)
+
+
+def _emails(client, session_id):
+    body = client.get(f'/api/quiz/participants?session_id={session_id}&fields=email&limit=500').get_json()
+    return sorted(p['email'] for p in body['participants'])
+
+
+def test_csv_import_inserts_valid_rows_and_reports_the_rest(client, session_id, register):
+    register(email='taken@example.com')
+    csv = HEADER + (
+        'अनिल,हिंदी,अधिकारी,Anil@Example.com,1\n'
+        'अनिल,हिंदी,अधिकारी,anil@example.com,2\n'
+        'सुनीता,हिंदी,,sunita@example.com,3\n'
+        'रमेश,हिंदी,सहायक,TAKEN@example.com,4\n'
+    )
+    # Excel's BOM must not end up in the first header name
+    response = _import(client, session_id, csv.encode('utf-8-sig'))
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report['total_rows'], report['imported'], report['failed']) == (4, 1, 3)
+    assert [e['row'] for e in report['errors']] == [2, 3, 4]
+    assert _emails(client, session_id) == ['anil@example.com', 'taken@example.com']
+
+
+def test_json_array_and_ndjson_imports(client, session_id):
+    rows = [
+        {'name': 'क', 'department': 'द', 'post': 'प', 'email': f'json{i}@example.com', 'mobile': str(i)}
+        for i in range(3)
+    ]
+    response = _import(client, session_id, json.dumps(rows), 'application/json')
+    assert response.get_json()['imported'] == 3
+
+    ndjson = '\n'.join(json.dumps({**row, 'email': 'nd' + row['email']}) for row in rows)
+    response = _import(client, session_id, ndjson, 'application/x-ndjson', format='json')
+    assert response.get_json()['imported'] == 3
+    assert len(_emails(client, session_id)) == 6
+
+
+def test_multipart_upload(client, session_id):
+    data = {'file': (io.BytesIO((HEADER + 'क,द,प,upload@example.com,1\n').encode('utf-8')), 'roster.csv')}
+    response = client.post(f'/admin/participants/import?session_id={session_id}', data=data,
+                           content_type='multipart/form-data')
+    assert response.get_json()['imported'] == 1
+
+
+def test_malformed_json_is_a_format_error(client, session_id):
+    response = _import(client, session_id, '[{"name": "क", ', 'application/json')
+    assert response.status_code == 400
+
+
+def test_upload_that_breaks_after_the_first_chunk_reports_what_was_imported(client, session_id, monkeypatch):
+    monkeypatch.setattr(roster_import, 'IMPORT_CHUNK_SIZE', 2)
+    rows = ',\n'.join(json.dumps(
+        {'name': 'क', 'department': 'द', 'post': 'प', 'email': f'part{i}@example.com', 'mobile': str(i)}
+    ) for i in range(3))
+    response = _import(client, session_id, f'[{rows},\n{{"name": "क", ]', 'application/json')
+    assert response.status_code == 400
+    report = response.get_json()
+    assert report['error'].startswith('JSON')
+    assert (report['imported'], report['stopped_at_row']) == (3, 4)
+    assert len(_emails(client, session_id)) == 3
+
+
+def test_json_records_are_parsed_across_read_boundaries(monkeypatch):
+    monkeypatch.setattr(roster_import, 'READ_SIZE', 5)
+    records = [{'email': f'चुनाव{i}@example.com', 'n': i} for i in range(4)]
+    stream = io.BytesIO(json.dumps(records, ensure_ascii=False).encode('utf-8'))
+    assert list(iter_json_records(stream)) == list(enumerate(records, 1))
+
+
+def test_truncated_json_raises(monkeypatch):
+    monkeypatch.setattr(roster_import, 'READ_SIZE', 5)
+    with pytest.raises(ImportFormatError):
+        list(iter_json_records(io.BytesIO(b'[{"email": "a@example.com"}, {"email": ')))
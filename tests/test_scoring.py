@@ -0,0 +1,153 @@
+from datetime import datetime
+import json
+
+import pytest
+
+from src.routes import admin
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.submissions import submission_queue
+from src.services.scoring import (
+    QuestionBank, get_question_bank, reload_question_bank, rescore_all, QUESTIONS_PATH,
+    CORRECT_POINTS, WRONG_POINTS, UNANSWERED
+)
+
+QUESTIONS = [
+    {'id': 1, 'question': 'प्रश्न 1', 'options': ['क', 'ख', 'ग', 'घ'], 'correct': 0},
+    {'id': 2, 'question': 'प्रश्न 2', 'options': ['क', 'ख', 'ग', 'घ'], 'correct': 2},
+    {'id': 3, 'question': 'प्रश्न 3', 'options': ['क', 'ख', 'ग'], 'correct': 1},
+]
+
+
+def test_grade_scores_correct_wrong_and_unanswered():
+    bank = QuestionBank(QUESTIONS)
+    score, correct, row = bank.grade([
+        {'questionId': 1, 'selectedAnswer': 0},
+        {'questionId': 2, 'selectedAnswer': 1},
+    ])
+    assert row == [0, 1, UNANSWERED]
+    assert correct == 1
+    assert score == CORRECT_POINTS + WRONG_POINTS
+
+
+def test_grade_ignores_malformed_answers():
+    bank = QuestionBank(QUESTIONS)
+    score, correct, row = bank.grade([
+        {'questionId': 1, 'selectedAnswer': True},
+        {'questionId': 2, 'selectedAnswer': '2'},
+        {'questionId': 3, 'selectedAnswer': 3},
+        {'questionId': 99, 'selectedAnswer': 0},
+        'not an answer',
+    ])
+    assert row == [UNANSWERED] * 3
+    assert (score, correct) == (0, 0)
+
+
+def test_later_answer_to_a_question_wins():
+    bank = QuestionBank(QUESTIONS)
+    _, _, row = bank.grade([
+        {'questionId': 3, 'selectedAnswer': 0},
+        {'questionId': 3, 'selectedAnswer': 1},
+    ])
+    assert row[2] == 1
+
+
+def test_grade_matrix_matches_single_grading():
+    bank = QuestionBank(QUESTIONS)
+    rows = [[0, 2, 1], [1, 1, UNANSWERED], [UNANSWERED] * 3]
+    scores, correct_counts = bank.grade_matrix(rows)
+    for row, score, correct in zip(rows, scores.tolist(), correct_counts.tolist()):
+        answers = [
+            {'questionId': q['id'], 'selectedAnswer': selected}
+            for q, selected in zip(QUESTIONS, row) if selected != UNANSWERED
+        ]
+        assert bank.grade(answers)[:2] == (score, correct)
+
+
+def test_packed_selections_round_trip():
+    bank = QuestionBank(QUESTIONS)
+    row = [0, UNANSWERED, 2]
+    packed = bank.pack(row)
+    assert len(packed) == len(QUESTIONS)
+    assert bank.unpack([packed]).tolist() == [row]
+
+
+def test_selection_matrix_decodes_answers_where_packed_rows_are_missing():
+    bank = QuestionBank(QUESTIONS)
+    stored = json.dumps(bank.stored_answers([1, 2, UNANSWERED]))
+    matrix = bank.selection_matrix([bank.pack([0, 0, 0]), None], [None, stored])
+    assert matrix.tolist() == [[0, 0, 0], [1, 2, UNANSWERED]]
+
+
+
+@pytest.fixture
+def corrected_key(app, tmp_path, monkeypatch):
+    """Publish a key with question 1's answer moved to option 0; the bundled key is republished after"""
+    questions = json.loads(open(QUESTIONS_PATH, encoding='utf-8').read())
+    questions[0]['correct'] = 0
+    path = tmp_path / 'questions.json'
+    path.write_text(json.dumps(questions, ensure_ascii=False), encoding='utf-8')
+    # What POST /admin/rescore publishes
+    monkeypatch.setattr(admin, 'reload_question_bank', lambda: reload_question_bank(str(path)))
+    with app.app_context():
+        old = get_question_bank()
+        yield old, lambda: reload_question_bank(str(path))
+        reload_question_bank()
+
+
+def _stored(app, participant_id):
+    with app.app_context():
+        return db.session.get(Participant, participant_id)
+
+
+def test_submit_is_graded_on_the_server(client, participant):
+    # Client-posted score fields are ignored
+    answers = [{'questionId': q['id'], 'selectedAnswer': q['correct']} for q in get_question_bank().questions]
+    response = client.post(f'/api/quiz/participants/{participant["id"]}/submit',
+                           json={'answers': answers, 'time_taken': 30, 'score': 0, 'correct_answers': 0})
+    assert response.status_code == 200
+    result = response.get_json()['participant']
+    total = len(get_question_bank())
+    assert (result['score'], result['correct_answers'], result['total_questions']) == (
+        total * CORRECT_POINTS, total, total
+    )
+
+
+def test_rescore_regrades_results_still_queued(app, client, register, corrected_key, monkeypatch):
+    participant = register()
+    # Hold the result in the queue until the rescore drains it
+    monkeypatch.setattr(submission_queue, 'flush_interval', 0.5)
+    response = client.post(f'/api/quiz/participants/{participant["id"]}/submit',
+                           json={'answers': [{'questionId': 1, 'selectedAnswer': 0}]})
+    assert response.get_json()['participant']['score'] == WRONG_POINTS
+
+    assert client.post('/admin/rescore').status_code == 200
+    row = _stored(app, participant['id'])
+    assert row.score == CORRECT_POINTS
+    assert row.answer_key_version == get_question_bank().version
+
+
+def test_result_graded_with_an_old_key_is_regraded_when_flushed(app, register, corrected_key):
+    old, publish = corrected_key
+    participant = register()
+    # Graded by a worker that has not seen the new key yet
+    score, correct, selections = old.grade([{'questionId': 1, 'selectedAnswer': 0}])
+    assert score == WRONG_POINTS
+    with app.app_context():
+        new = publish()
+        rescore_all(new)
+    submission_queue.submit(participant['id'], score, correct, len(old), 5,
+                            json.dumps(old.stored_answers(selections)), old.pack(selections),
+                            datetime.utcnow(), participant['session_id'], old.version)
+    assert submission_queue.wait_idle(timeout=5)
+
+    row = _stored(app, participant['id'])
+    assert (row.score, row.correct_answers, row.answer_key_version) == (CORRECT_POINTS, 1, new.version)
+
+
+def test_repeated_rescore_only_touches_rows_graded_since(app, register, corrected_key):
+    _, publish = corrected_key
+    with app.app_context():
+        new = publish()
+        rescore_all(new)
+        assert rescore_all(new) == 0
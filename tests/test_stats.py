@@ -0,0 +1,58 @@
+import threading
+
+from src.models.participant import Participant
+from src.services.stats import stats_caches, load_score_snapshot
+
+
+def _stats(client, session_id):
+    return client.get(f'/api/quiz/participants/stats?session_id={session_id}').get_json()['stats']
+
+
+def test_registration_counted_by_a_reload_is_not_counted_again(app, session_id):
+    stats = stats_caches.get(session_id)
+    with app.app_context():
+        stats.get()
+        row = Participant.insert_if_new(session_id=session_id, name='क', department='द', post='प',
+                                        email='reloaded@example.com', mobile='1')
+        # Another thread reloads between this registration's commit and its record_registration
+        stats.invalidate()
+        assert stats.get()['total_participants'] == 1
+        stats.record_registration(row.id)
+        assert stats.get()['total_participants'] == 1
+
+
+def test_stats_stay_consistent_under_concurrent_registration_and_reload(app, session_id, register):
+    stats = stats_caches.get(session_id)
+    done = threading.Event()
+
+    def reload():
+        with app.app_context():
+            while not done.is_set():
+                stats.invalidate()
+                stats.get()
+
+    def register_and_submit(count):
+        client = app.test_client()
+        for _ in range(count):
+            participant = register()
+            client.post(f'/api/quiz/participants/{participant["id"]}/submit',
+                        json={'answers': [], 'time_taken': 3})
+
+    reloader = threading.Thread(target=reload)
+    reloader.start()
+    writers = [threading.Thread(target=register_and_submit, args=(10,)) for _ in range(4)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    done.set()
+    reloader.join()
+
+    # The patched counts match what a fresh read of the table and queue gives
+    with app.app_context():
+        served = stats.get()
+        stats.invalidate()
+        assert stats.get() == served
+        total, _, _ = load_score_snapshot(session_id)
+    assert served['total_participants'] == total == 40
+    assert served['completed_participants'] == 40
@@ -0,0 +1,99 @@
+from datetime import datetime
+import json
+import os
+
+import pytest
+
+from src.models.user import db
+from src.models.participant import Participant
+from src.services.submissions import submission_queue, REJECTED_LOG_NAME
+from src.services.scoring import get_question_bank
+
+
+def _record(participant_id, **values):
+    return {
+        'participant_id': participant_id,
+        'score': 6,
+        'correct_answers': 2,
+        'total_questions': 25,
+        'time_taken': 40,
+        'answers': '[]',
+        'selections': '',
+        'completed_at': datetime.utcnow().isoformat(),
+        'answer_key_version': get_question_bank().version,
+        **values
+    }
+
+
+def _stored(app, participant_id):
+    with app.app_context():
+        return db.session.get(Participant, participant_id)
+
+
+def test_submit_reaches_the_table_after_the_flush(app, client, participant):
+    response = client.post(f'/api/quiz/participants/{participant["id"]}/submit',
+                           json={'answers': [], 'time_taken': 12})
+    assert response.status_code == 200
+
+    assert submission_queue.wait_idle(timeout=5)
+    row = _stored(app, participant['id'])
+    assert row.completed_at is not None
+    assert row.time_taken == 12
+    # Once everything is written the log is emptied
+    assert os.path.getsize(submission_queue.log.path) == 0
+
+
+def test_replay_applies_a_log_left_by_a_dead_process(app, participant):
+    path = os.path.join(submission_queue.log_dir, 'submissions-999999999.log')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(_record(participant['id'])) + '\n')
+        f.write('{"participant_id": ')  # torn final line
+
+    with app.app_context():
+        assert submission_queue.replay() == 1
+    assert not os.path.exists(path)
+    row = _stored(app, participant['id'])
+    assert (row.score, row.time_taken) == (6, 40)
+    assert row.completed_at is not None
+
+
+def test_replay_sets_aside_a_record_the_table_rejects(app, register):
+    bad, good = register(), register()
+    path = os.path.join(submission_queue.log_dir, 'submissions-999999998.log')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(_record(bad['id'], time_taken=[5])) + '\n')
+        f.write(json.dumps(_record(good['id'])) + '\n')
+
+    with app.app_context():
+        submission_queue.replay()
+    assert not os.path.exists(path)
+    assert _stored(app, good['id']).completed_at is not None
+    assert _stored(app, bad['id']).completed_at is None
+    with open(os.path.join(submission_queue.log_dir, REJECTED_LOG_NAME), encoding='utf-8') as f:
+        rejected = [json.loads(line)['record']['participant_id'] for line in f]
+    assert bad['id'] in rejected
+
+
+def test_flusher_keeps_going_past_a_record_the_table_rejects(app, register):
+    bad, good = register(), register()
+    version = get_question_bank().version
+    submission_queue.submit(bad['id'], 3, 1, 25, [5], '[]', b'', datetime.utcnow(), answer_key_version=version)
+    submission_queue.submit(good['id'], 3, 1, 25, 7, '[]', b'', datetime.utcnow(), answer_key_version=version)
+
+    assert submission_queue.wait_idle(timeout=5)
+    assert _stored(app, good['id']).time_taken == 7
+    assert _stored(app, bad['id']).completed_at is None
+
+
+@pytest.mark.parametrize('time_taken', [[5], -1, '5', 2.5, None])
+def test_malformed_time_taken_is_rejected_before_it_is_queued(client, participant, time_taken):
+    url = f'/api/quiz/participants/{participant["id"]}/submit'
+    assert client.post(url, json={'answers': [], 'time_taken': time_taken}).status_code == 400
+    # Nothing was accepted, so a valid submit still goes through
+    assert client.post(url, json={'answers': [], 'time_taken': 30}).status_code == 200
+
+
+def test_malformed_body_is_rejected(client, participant):
+    url = f'/api/quiz/participants/{participant["id"]}/submit'
+    assert client.post(url, data='not json', content_type='application/json').status_code == 400
+    assert client.post(url, json={'answers': {'questionId': 1}}).status_code == 400